@@ -1,9 +1,10 @@
 from fastapi_users import FastAPIUsers, BaseUserManager
-from fastapi_users.authentication import BearerTransport, JWTStrategy, AuthenticationBackend
+from fastapi_users.authentication import BearerTransport, AuthenticationBackend
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
 
 from app.auth.manager import get_user_manager
 from app.auth.models import User
+from app.auth.strategy import CachedJWTStrategy, user_cache
 from app.config import SECRET_AUTH
 
 from .override import sql_get_by_tg_id, manager_get_by_tg_id, authenticate, create
@@ -13,8 +14,8 @@ bearer_transport = BearerTransport(tokenUrl="auth/jwt/login")
 SECRET = SECRET_AUTH
 
 
-def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(secret=SECRET, lifetime_seconds=None)
+def get_jwt_strategy() -> CachedJWTStrategy:
+    return CachedJWTStrategy(secret=SECRET, lifetime_seconds=None, user_cache=user_cache)
 
 
 SQLAlchemyUserDatabase.get_by_tg_id = sql_get_by_tg_id
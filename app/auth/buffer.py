@@ -0,0 +1,168 @@
+import asyncio
+import logging
+from collections import Counter
+
+from sqlalchemy import Integer, select, update, column, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import models
+from app.cache import catalog_cache
+from app.config import VIEW_BUFFER_SIZE, VIEW_BUFFER_FLUSH_INTERVAL
+from app.course import models as course_models
+from app.database import async_session_maker
+from app.lesson import models as lesson_models
+
+logger = logging.getLogger(__name__)
+
+
+class ViewBuffer:
+    """
+    Write-behind buffer for lesson views.
+
+    Views are kept in memory, deduplicated by (user_id, lesson_id), and written in batches
+    when the buffer reaches max_size or every flush_interval seconds. Pending views stay
+    visible through get_pending_lessons until their batch has been written.
+    """
+
+    def __init__(self, max_size: int, flush_interval: float):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+
+        self._pending: dict[int, set[int]] = {}
+        self._pending_size = 0
+        self._flushing: dict[int, set[int]] = {}
+        self._lock = asyncio.Lock()
+        self._full = asyncio.Event()
+
+        self.flushes = 0
+        self.flushed_views = 0
+        self.failed_flushes = 0
+
+    def add(self, user_id: int, lesson_id: int) -> bool:
+        if self.is_pending(user_id, lesson_id):
+            return False
+
+        self._pending.setdefault(user_id, set()).add(lesson_id)
+        self._pending_size += 1
+        if self._pending_size >= self.max_size:
+            self._full.set()
+        return True
+
+    def is_pending(self, user_id: int, lesson_id: int) -> bool:
+        return lesson_id in self._pending.get(user_id, ()) or lesson_id in self._flushing.get(user_id, ())
+
+    def get_pending_lessons(self, user_id: int) -> set[int]:
+        return self._pending.get(user_id, set()) | self._flushing.get(user_id, set())
+
+    async def flush(self):
+        async with self._lock:
+            if not self._pending:
+                return
+
+            self._flushing, self._pending = self._pending, {}
+            self._pending_size = 0
+            views = [(user_id, lesson_id) for user_id, lesson_ids in self._flushing.items() for lesson_id in lesson_ids]
+            try:
+                async with async_session_maker() as session:
+                    await insert_views(views, session)
+            except BaseException:
+                self._flushing = {}
+                self.failed_flushes += 1
+                for user_id, lesson_id in views:
+                    self.add(user_id, lesson_id)
+                raise
+            self._flushing = {}
+
+            self.flushes += 1
+            self.flushed_views += len(views)
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush %d buffered views", self._pending_size)
+
+    def get_stats(self) -> dict:
+        return {
+            "pending": self._pending_size,
+            "flushes": self.flushes,
+            "flushed_views": self.flushed_views,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+async def insert_views(views: list[tuple[int, int]], db: AsyncSession) -> list[int]:
+    buffered_views = values(column('user_id', Integer), column('lesson_id', Integer), name='buffered_view').data(views)
+
+    # Views of lessons deleted since the tap are dropped by the join instead of failing the whole batch
+    db_result = await db.execute(
+        insert(models.View).
+        from_select(['user_id', 'lesson_id'],
+                    select(buffered_views.c.user_id, buffered_views.c.lesson_id).
+                    join(lesson_models.Lesson, lesson_models.Lesson.id == buffered_views.c.lesson_id)).
+        on_conflict_do_nothing(index_elements=[models.View.user_id, models.View.lesson_id]).
+        returning(models.View.lesson_id)
+    )
+    lesson_ids = list(db_result.scalars().all())
+
+    # Every user in the batch needs a new revision, as their ETags stop listing the buffered views
+    revisions = await catalog_cache.bump_user_revisions({user_id for user_id, _ in views}, db)
+    version = None
+    if lesson_ids:
+        await _increment_view_counters(lesson_ids, db)
+        if catalog_cache.counters_stale():
+            version = await catalog_cache.bump_version(db)
+    await db.commit()
+
+    await catalog_cache.invalidate_users(revisions)
+    if version is not None:
+        await catalog_cache.invalidate(version)
+    return lesson_ids
+
+
+async def _increment_view_counters(lesson_ids: list[int], db: AsyncSession):
+    # An UPDATE locks rows in whatever order its plan visits them, so counters are locked in id order first,
+    # all lessons before any course, the same order reconcile_view_counters takes them in
+    lesson_views = Counter(lesson_ids)
+    await db.execute(select(lesson_models.Lesson.id).
+                     where(lesson_models.Lesson.id.in_(lesson_views)).
+                     order_by(lesson_models.Lesson.id).
+                     with_for_update(key_share=True))
+    new_views = values(column('lesson_id', Integer), column('number_of_views', Integer), name='new_view').data(
+        list(lesson_views.items()))
+    db_result = await db.execute(
+        update(lesson_models.Lesson).
+        where(lesson_models.Lesson.id == new_views.c.lesson_id).
+        values(number_of_views=lesson_models.Lesson.number_of_views + new_views.c.number_of_views).
+        returning(lesson_models.Lesson.course_id, new_views.c.number_of_views)
+    )
+
+    course_views = Counter()
+    for course_id, number_of_views in db_result.all():
+        if course_id is not None:
+            course_views[course_id] += number_of_views
+    if not course_views:
+        return
+
+    await db.execute(select(course_models.Course.id).
+                     where(course_models.Course.id.in_(course_views)).
+                     order_by(course_models.Course.id).
+                     with_for_update(key_share=True))
+    new_course_views = values(column('course_id', Integer), column('number_of_views', Integer),
+                              name='new_course_view').data(list(course_views.items()))
+    await db.execute(
+        update(course_models.Course).
+        where(course_models.Course.id == new_course_views.c.course_id).
+        values(number_of_views=course_models.Course.number_of_views + new_course_views.c.number_of_views)
+    )
+
+
+view_buffer = ViewBuffer(VIEW_BUFFER_SIZE, VIEW_BUFFER_FLUSH_INTERVAL)
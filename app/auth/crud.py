@@ -1,12 +1,21 @@
+from datetime import datetime, timedelta, timezone
+
 from fastapi import UploadFile
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import models, schemas
+from app.auth.buffer import view_buffer
 from app.auth.models import User
+from app.auth.strategy import user_cache
+from app.cache import catalog_cache
 from app.lesson import models as lesson_models
-from app.lesson.crud import get_lesson
-from app.utils import delete_file, upload_file
+from app.lesson.crud import get_lessons_by_ids
+from app.utils import delete_file, upload_file, encode_cursor
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
 
 async def get_all_users(db: AsyncSession):
@@ -16,9 +25,13 @@ async def get_all_users(db: AsyncSession):
 
 
 async def update_avatar(user: User, avatar: UploadFile, db: AsyncSession):
+    path_to_avatar = await upload_file('users/avatar', avatar, avatar.filename if avatar else None)
     delete_file(user.path_to_avatar)
-    user.path_to_avatar = upload_file('users/avatar', avatar, avatar.filename if avatar else None)
+    user.path_to_avatar = path_to_avatar
+    # The user may be a detached snapshot from the user cache
+    db.add(user)
     await db.commit()
+    user_cache.invalidate(user.id)
 
 
 async def create_planned_lesson(planned_lesson: schemas.PlannedLessonCreate, user_id: int, db: AsyncSession):
@@ -46,78 +59,134 @@ async def delete_link_after_lesson(plan_lesson_id: int, db: AsyncSession):
     return True
 
 
-async def get_planned_lessons_by_user(user_id: int, db: AsyncSession):
-    db_planned_lessons = await db.execute(select(models.PlannedLesson).where(models.PlannedLesson.user_id == user_id))
-    obj_planned_lessons = db_planned_lessons.scalars().all()
+async def get_planned_lessons_by_user(user_id: int,
+                                      db: AsyncSession,
+                                      limit: int | None = None,
+                                      after: list[int] | None = None,
+                                      since: datetime | None = None,
+                                      until: datetime | None = None,
+                                      compact: bool = False):
+    query = (select(models.PlannedLesson.id, models.PlannedLesson.timestamp, models.PlannedLesson.lesson_id).
+             where(models.PlannedLesson.user_id == user_id))
+    if since is not None:
+        query = query.where(models.PlannedLesson.timestamp >= since)
+    if until is not None:
+        query = query.where(models.PlannedLesson.timestamp < until)
+    if after is not None:
+        after_timestamp = EPOCH + timedelta(microseconds=after[0])
+        query = query.where(tuple_(models.PlannedLesson.timestamp, models.PlannedLesson.id) >
+                            tuple_(after_timestamp, after[1]))
+    query = query.order_by(models.PlannedLesson.timestamp, models.PlannedLesson.id)
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    db_planned_lessons = await db.execute(query)
+    planned_lessons = [dict(row) for row in db_planned_lessons.mappings()]
+
+    next_cursor = None
+    if limit is not None and len(planned_lessons) > limit:
+        planned_lessons = planned_lessons[:limit]
+        last = planned_lessons[-1]
+        next_cursor = encode_cursor([(last['timestamp'] - EPOCH) // timedelta(microseconds=1), last['id']])
+
+    if compact:
+        return planned_lessons, next_cursor
+
+    lessons = await get_lessons_by_ids([obj['lesson_id'] for obj in planned_lessons], user_id, db)
+    lessons = {lesson['id']: lesson for lesson in lessons}
+    for obj in planned_lessons:
+        obj['lesson'] = lessons.get(obj['lesson_id'])
+
+    return planned_lessons, next_cursor
+
 
-    for obj in obj_planned_lessons:
-        obj.lesson = await get_lesson(obj.lesson_id, user_id, db)
+async def create_view(user_id: int, lesson_id: int, db: AsyncSession):
+    if view_buffer.is_pending(user_id, lesson_id):
+        return 'already_exists'
 
-    return obj_planned_lessons
+    db_result = await db.execute(select(
+        select(lesson_models.Lesson.id).where(lesson_models.Lesson.id == lesson_id).exists(),
+        select(models.View.id).where(and_(models.View.user_id == user_id, models.View.lesson_id == lesson_id)).exists()
+    ))
+    lesson_exists, view_exists = db_result.one()
+    if not lesson_exists:
+        return 'no_lesson'
+    if view_exists or not view_buffer.add(user_id, lesson_id):
+        return 'already_exists'
+    # The flush bumps the user's catalog revision, until then get_catalog_etag covers the view
+    return True
 
 
-async def create_view(user_id: int, lesson_id: int, db: AsyncSession):
-    db_lesson = await db.get(lesson_models.Lesson, lesson_id)
-    if not db_lesson:
+async def create_favorite(user_id: int, lesson_id: int, db: AsyncSession):
+    try:
+        db_result = await db.execute(
+            insert(models.Favorite).
+            values(user_id=user_id, lesson_id=lesson_id).
+            on_conflict_do_nothing(index_elements=[models.Favorite.user_id, models.Favorite.lesson_id]).
+            returning(models.Favorite.id)
+        )
+        created_id = db_result.scalar()
+        revisions = await catalog_cache.bump_user_revisions([user_id], db) if created_id is not None else {}
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
         return 'no_lesson'
 
-    db_lesson = await db.execute(
-        select(models.View).filter(and_(models.View.user_id == user_id, models.View.lesson_id == lesson_id))
-    )
-    if db_lesson.scalar():
+    if created_id is None:
         return 'already_exists'
+    await catalog_cache.invalidate_users(revisions)
+    return created_id
 
-    db_view = models.View(
-        **{
-            'user_id': user_id,
-            'lesson_id': lesson_id
-        }
-    )
-    db.add(db_view)
 
-    await db.commit()
-    return db_view
+async def get_catalog_etag(user_id: int | None, db: AsyncSession) -> str:
+    if user_id is None:
+        return await catalog_cache.get_etag(db)
+    return await catalog_cache.get_etag(db, user_id, view_buffer.get_pending_lessons(user_id))
 
 
-async def create_favorite(user_id: int, lesson_id: int, db: AsyncSession):
-    db_lesson = await db.get(lesson_models.Lesson, lesson_id)
-    if not db_lesson:
-        return 'no_lesson'
+async def get_views_by_user(user_id: int,
+                            db: AsyncSession,
+                            limit: int | None = None,
+                            after: list[int] | None = None):
+    query = select(models.View.id, models.View.lesson_id).where(models.View.user_id == user_id)
+    rows, next_cursor = await _paginate_by_id(query, models.View.id, db, limit, after)
+    lesson_ids = [row.lesson_id for row in rows]
 
-    db_lesson = await db.execute(
-        select(models.Favorite).filter(and_(models.Favorite.user_id == user_id, models.Favorite.lesson_id == lesson_id))
-    )
-    if db_lesson.scalar():
-        return 'already_exists'
+    # Views still waiting in the buffer have no row yet, so they come after the last stored one
+    pending_lesson_ids = view_buffer.get_pending_lessons(user_id)
+    if next_cursor is None and pending_lesson_ids:
+        db_views = await db.execute(select(models.View.lesson_id).
+                                    where(and_(models.View.user_id == user_id,
+                                               models.View.lesson_id.in_(pending_lesson_ids))))
+        lesson_ids += sorted(pending_lesson_ids - set(db_views.scalars().all()))
 
-    db_favorite = models.Favorite(
-        **{
-            'user_id': user_id,
-            'lesson_id': lesson_id
-        }
-    )
-    db.add(db_favorite)
+    return await get_lessons_by_ids(lesson_ids, user_id, db), next_cursor
 
-    await db.commit()
-    return db_favorite
+
+async def get_favorites_by_user(user_id: int,
+                                db: AsyncSession,
+                                limit: int | None = None,
+                                after: list[int] | None = None):
+    query = select(models.Favorite.id, models.Favorite.lesson_id).where(models.Favorite.user_id == user_id)
+    rows, next_cursor = await _paginate_by_id(query, models.Favorite.id, db, limit, after)
+    return await get_lessons_by_ids([row.lesson_id for row in rows], user_id, db), next_cursor
 
 
-async def get_views_by_user(user_id: int, db: AsyncSession):
-    db_views = await db.execute(select(models.View).where(models.View.user_id == user_id))
-    lesson_ids = tuple(view.lesson_id for view in db_views.scalars().all())
-    if not lesson_ids:
-        return []
-    obj_lessons = [await get_lesson(lesson_id, user_id, db) for lesson_id in lesson_ids]
-    return obj_lessons
+async def _paginate_by_id(query, id_column, db: AsyncSession, limit: int | None, after: list[int] | None):
+    if after is not None:
+        query = query.where(id_column > after[0])
+    query = query.order_by(id_column)
+    if limit is not None:
+        query = query.limit(limit + 1)
 
+    db_result = await db.execute(query)
+    rows = db_result.all()
 
-async def get_favorites_by_user(user_id: int, db: AsyncSession):
-    db_favorites = await db.execute(select(models.Favorite).where(models.Favorite.user_id == user_id))
-    lesson_ids = tuple(view.lesson_id for view in db_favorites.scalars().all())
-    if not lesson_ids:
-        return []
-    obj_lessons = [await get_lesson(lesson_id, user_id, db) for lesson_id in lesson_ids]
-    return obj_lessons
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].id])
+    return rows, next_cursor
 
 
 async def delete_favorite(user_id: int, lesson_id: int, db: AsyncSession):
@@ -128,4 +197,6 @@ async def delete_favorite(user_id: int, lesson_id: int, db: AsyncSession):
     if not obj_favorite:
         return 'no_lesson'
     await db.delete(obj_favorite)
+    revisions = await catalog_cache.bump_user_revisions([user_id], db)
     await db.commit()
+    await catalog_cache.invalidate_users(revisions)
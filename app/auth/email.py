@@ -1,8 +1,21 @@
-from fastapi_mail import ConnectionConfig, MessageSchema, MessageType, FastMail
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from email.message import EmailMessage
+from email.utils import formataddr
+
+import aiosmtplib
+from fastapi_mail import ConnectionConfig
 
 from app.auth.schemas import EmailSchema
 from app.config import (MAIL_USERNAME, MAIL_PASSWORD, MAIL_FROM, MAIL_PORT, MAIL_SERVER, MAIL_FROM_NAME,
-                        MAIL_STARTTLS, MAIL_SSL_TLS, USE_CREDENTIALS, VALIDATE_CERTS, SERVER_URL)
+                        MAIL_STARTTLS, MAIL_SSL_TLS, USE_CREDENTIALS, VALIDATE_CERTS, SERVER_URL,
+                        MAIL_OUTBOX_SIZE, MAIL_BATCH_SIZE, MAIL_MAX_ATTEMPTS, MAIL_RETRY_DELAY, MAIL_IDLE_TIMEOUT)
+
+logger = logging.getLogger(__name__)
 
 conf = ConnectionConfig(
     MAIL_USERNAME=MAIL_USERNAME,
@@ -17,15 +30,180 @@ conf = ConnectionConfig(
     VALIDATE_CERTS=VALIDATE_CERTS
 )
 
+SEND_ERRORS = (aiosmtplib.SMTPException, OSError)
 
-async def forgot_password_mail(email: EmailSchema, token: str):
-    html = f"""<p>{SERVER_URL}change-password?token={token}</p>"""
 
-    message = MessageSchema(
-        subject="Восстановление забытого пароля",
-        recipients=email.dict().get("email"),
-        body=html,
-        subtype=MessageType.html)
+@dataclass
+class OutgoingMail:
+    message: EmailMessage
+    attempts: int = 0
+
+
+class MailOutbox:
+    """
+    In-memory queue of outgoing mail, delivered by run() in the background.
+
+    Deliveries share one SMTP connection, which is closed after idle_timeout seconds without
+    mail. A failed message is retried after retry_delay, doubled on every attempt, until
+    max_attempts is reached. Requests only enqueue, so they never wait on the mail server.
+    flush() sends everything still queued or waiting for a retry.
+    """
+
+    def __init__(self,
+                 config: ConnectionConfig,
+                 max_size: int,
+                 batch_size: int,
+                 max_attempts: int,
+                 retry_delay: float,
+                 idle_timeout: float):
+        self.config = config
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.idle_timeout = idle_timeout
+
+        self._queue: asyncio.Queue[OutgoingMail] = asyncio.Queue(max_size)
+        self._smtp: aiosmtplib.SMTP | None = None
+        # Heap of (due time, sequence number, mail), the sequence keeps mail from being compared
+        self._retrying: list[tuple[float, int, OutgoingMail]] = []
+        self._sequence = itertools.count()
+
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.connections = 0
+
+    def enqueue(self, recipients: list[str], subject: str, html: str) -> bool:
+        message = EmailMessage()
+        message["From"] = formataddr((self.config.MAIL_FROM_NAME, self.config.MAIL_FROM))
+        message["To"] = ", ".join(recipients)
+        message["Subject"] = subject
+        message.set_content(html, subtype="html")
+        return self._put(OutgoingMail(message))
+
+    async def run(self):
+        while True:
+            try:
+                batch = await self._next_batch()
+                await self._deliver(batch)
+            except Exception:
+                logger.exception("Failed to deliver queued mail")
+
+    async def _next_batch(self) -> list[OutgoingMail]:
+        batch = []
+        now = time.monotonic()
+        while self._retrying and self._retrying[0][0] <= now and len(batch) < self.batch_size:
+            batch.append(heapq.heappop(self._retrying)[2])
+
+        if not batch:
+            retry_in = self._retrying[0][0] - now if self._retrying else None
+            idle = self._smtp is not None and (retry_in is None or retry_in > self.idle_timeout)
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=self.idle_timeout if idle else retry_in))
+            except asyncio.TimeoutError:
+                if idle:
+                    await self._disconnect()
+                return batch
+
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def flush(self):
+        # Nothing retries mail after shutdown, so mail waiting for its retry delay is sent now
+        batch = [mail for _, _, mail in self._retrying]
+        self._retrying.clear()
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        await self._deliver(batch)
+        await self._disconnect()
+
+    async def _deliver(self, batch: list[OutgoingMail]):
+        for index, mail in enumerate(batch):
+            mail.attempts += 1
+            try:
+                await self._send(mail.message)
+            except asyncio.CancelledError:
+                # The reply to the interrupted command would be read as the reply to the next one
+                if self._smtp is not None:
+                    self._smtp.close()
+                    self._smtp = None
+                # Mail interrupted by shutdown is not lost, flush() sends it again
+                mail.attempts -= 1
+                for unsent in batch[index:]:
+                    self._put(unsent)
+                raise
+            except SEND_ERRORS:
+                await self._disconnect()
+                if mail.attempts >= self.max_attempts:
+                    self.failed += 1
+                    logger.exception("Failed to deliver mail to %s", mail.message["To"])
+                else:
+                    self._retry_later(mail)
+                continue
+            self.sent += 1
+
+    async def _send(self, message: EmailMessage):
+        if self.config.SUPPRESS_SEND:
+            return
+        # The server may have closed the connection while it was idle
+        if self._smtp is not None and not self._smtp.is_connected:
+            self._smtp = None
+        if self._smtp is None:
+            self._smtp = await self._connect()
+        await self._smtp.send_message(message)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(hostname=self.config.MAIL_SERVER,
+                               port=self.config.MAIL_PORT,
+                               timeout=self.config.TIMEOUT,
+                               use_tls=self.config.MAIL_SSL_TLS,
+                               start_tls=self.config.MAIL_STARTTLS,
+                               validate_certs=self.config.VALIDATE_CERTS)
+        await smtp.connect()
+        if self.config.USE_CREDENTIALS:
+            await smtp.login(self.config.MAIL_USERNAME, self.config.MAIL_PASSWORD)
+        self.connections += 1
+        return smtp
+
+    async def _disconnect(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except SEND_ERRORS:
+            smtp.close()
+
+    def _put(self, mail: OutgoingMail) -> bool:
+        try:
+            self._queue.put_nowait(mail)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error("Mail outbox is full, dropped mail to %s", mail.message["To"])
+            return False
+        return True
+
+    def _retry_later(self, mail: OutgoingMail):
+        due = time.monotonic() + self.retry_delay * 2 ** (mail.attempts - 1)
+        heapq.heappush(self._retrying, (due, next(self._sequence), mail))
+
+    def get_stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "retrying": len(self._retrying),
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "connections": self.connections,
+        }
+
+
+mail_outbox = MailOutbox(conf, MAIL_OUTBOX_SIZE, MAIL_BATCH_SIZE, MAIL_MAX_ATTEMPTS, MAIL_RETRY_DELAY,
+                         MAIL_IDLE_TIMEOUT)
+
+
+def forgot_password_mail(email: EmailSchema, token: str) -> bool:
+    html = f"""<p>{SERVER_URL}change-password?token={token}</p>"""
 
-    fm = FastMail(conf)
-    await fm.send_message(message)
+    return mail_outbox.enqueue(email.dict().get("email"), "Восстановление забытого пароля", html)
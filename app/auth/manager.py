@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from fastapi import Depends, Request, Response
 from fastapi_users import BaseUserManager, IntegerIDMixin
@@ -6,6 +6,7 @@ from fastapi_users import BaseUserManager, IntegerIDMixin
 from app.auth.email import forgot_password_mail
 from app.auth.models import User
 from app.auth.schemas import EmailSchema
+from app.auth.strategy import user_cache
 from app.utils import get_user_db
 from app.config import SECRET_AUTH
 
@@ -20,13 +21,25 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
     async def on_after_register(self, user: User, request: Optional[Request] = None):
         print(f"User {user.id} has registered.")
 
+    async def on_after_update(self, user: User, update_dict: Dict[str, Any], request: Optional[Request] = None):
+        user_cache.invalidate(user.id)
+
+    async def on_after_delete(self, user: User, request: Optional[Request] = None):
+        user_cache.invalidate(user.id)
+
+    async def on_after_verify(self, user: User, request: Optional[Request] = None):
+        user_cache.invalidate(user.id)
+
+    async def on_after_reset_password(self, user: User, request: Optional[Request] = None):
+        user_cache.invalidate(user.id)
+
     async def on_after_forgot_password(
             self, user: User, token: str, request: Optional[Request] = None
     ):
         payload = await request.json()
         email = EmailSchema(email=[payload['email'], ])
         print(f"User {user.id} has forgot their password. Reset token: {token}")
-        await forgot_password_mail(email=email, token=token)
+        forgot_password_mail(email=email, token=token)
 
     async def on_after_request_verify(
             self, user: User, token: str, request: Optional[Request] = None
@@ -1,5 +1,5 @@
 from fastapi_users_db_sqlalchemy import SQLAlchemyBaseUserTable
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -12,41 +12,52 @@ class User(SQLAlchemyBaseUserTable[int], Base):
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
     path_to_avatar = Column(String)
+    # Bumped with every change of the user's views and favourites, see CatalogCache.get_etag
+    catalog_revision = Column(BigInteger, nullable=False, server_default='0')
 
-    planned_lessons = relationship("PlannedLesson", back_populates="user", cascade="all, delete")
-    views = relationship("View", back_populates="user", cascade="all, delete")
-    favorites = relationship("Favorite", back_populates="user", cascade="all, delete")
+    planned_lessons = relationship("PlannedLesson", back_populates="user", cascade="all, delete", lazy='raise')
+    views = relationship("View", back_populates="user", cascade="all, delete", lazy='raise')
+    favorites = relationship("Favorite", back_populates="user", cascade="all, delete", lazy='raise')
 
 
 class PlannedLesson(Base):
     __tablename__ = "planned_lesson"
+    __table_args__ = (
+        Index('ix_planned_lesson_user_id_timestamp', 'user_id', 'timestamp'),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     timestamp = Column(DateTime(timezone=True), nullable=False)
 
     user_id = Column(Integer, ForeignKey("user.id"))
-    user = relationship("User", back_populates="planned_lessons", lazy='selectin')
+    user = relationship("User", back_populates="planned_lessons", lazy='raise')
 
-    lesson_id = Column(Integer, ForeignKey("lesson.id"))
-    lesson = relationship("Lesson", back_populates="planned_lessons", lazy='selectin')
+    lesson_id = Column(Integer, ForeignKey("lesson.id"), index=True)
+    lesson = relationship("Lesson", back_populates="planned_lessons", lazy='raise')
 
 
 class View(Base):
     __tablename__ = "view"
+    __table_args__ = (
+        Index('ix_view_user_id_lesson_id', 'user_id', 'lesson_id', unique=True),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
 
     user_id = Column(Integer, ForeignKey("user.id"))
-    user = relationship("User", back_populates="views", lazy='selectin')
+    user = relationship("User", back_populates="views", lazy='raise')
 
-    lesson_id = Column(Integer, ForeignKey("lesson.id"))
-    lesson = relationship("Lesson", back_populates="views", lazy='selectin')
+    lesson_id = Column(Integer, ForeignKey("lesson.id"), index=True)
+    lesson = relationship("Lesson", back_populates="views", lazy='raise')
 
 
 class Favorite(Base):
     __tablename__ = "favorite"
+    __table_args__ = (
+        Index('ix_favorite_user_id_lesson_id', 'user_id', 'lesson_id', unique=True),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
 
     user_id = Column(Integer, ForeignKey("user.id"))
-    user = relationship("User", back_populates="favorites", lazy='selectin')
+    user = relationship("User", back_populates="favorites", lazy='raise')
 
-    lesson_id = Column(Integer, ForeignKey("lesson.id"))
-    lesson = relationship("Lesson", back_populates="favorites", lazy='selectin')
+    lesson_id = Column(Integer, ForeignKey("lesson.id"), index=True)
+    lesson = relationship("Lesson", back_populates="favorites", lazy='raise')
@@ -4,6 +4,8 @@ from fastapi_users import exceptions, BaseUserManager, models, schemas
 from fastapi_users.models import UP
 from sqlalchemy import select
 
+from app.auth.password import password_pool
+
 
 async def sql_get_by_tg_id(self, tg_id: int) -> UP | None:
     statement = select(self.user_table).where(self.user_table.tg_id == tg_id)
@@ -46,11 +48,11 @@ async def authenticate(
     except exceptions.UserNotExists:
         # Run the hasher to mitigate timing attack
         # Inspired from Django: https://code.djangoproject.com/ticket/20760
-        self.password_helper.hash(credentials.password)
+        await password_pool.run(self.password_helper.hash, credentials.password)
         return None
 
-    verified, updated_password_hash = self.password_helper.verify_and_update(
-        credentials.password, user.hashed_password
+    verified, updated_password_hash = await password_pool.run(
+        self.password_helper.verify_and_update, credentials.password, user.hashed_password
     )
     if not verified:
         return None
@@ -97,7 +99,7 @@ async def create(
         else user_create.create_update_dict_superuser()
     )
     password = user_dict.pop("password")
-    user_dict["hashed_password"] = self.password_helper.hash(password)
+    user_dict["hashed_password"] = await password_pool.run(self.password_helper.hash, password)
 
     created_user = await self.user_db.create(user_dict)
 
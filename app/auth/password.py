@@ -0,0 +1,57 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from app.config import PASSWORD_HASH_WORKERS
+
+T = TypeVar("T")
+
+
+class PasswordHashingPool:
+    """
+    Runs bcrypt hashing and verification on a few dedicated threads.
+
+    bcrypt releases the GIL, so the event loop keeps serving requests while passwords are
+    checked. Calls beyond max_workers wait on a semaphore, where their queue time is measured,
+    instead of in the executor's unbounded queue.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="password-hashing")
+        self._semaphore = asyncio.Semaphore(max_workers)
+
+        self.queued = 0
+        self.calls = 0
+        self.total_queue_time = 0.0
+        self.max_queue_time = 0.0
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        queued_at = time.monotonic()
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        try:
+            queue_time = time.monotonic() - queued_at
+            self.calls += 1
+            self.total_queue_time += queue_time
+            self.max_queue_time = max(self.max_queue_time, queue_time)
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._semaphore.release()
+
+    def get_stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "queued": self.queued,
+            "calls": self.calls,
+            "avg_queue_time": self.total_queue_time / self.calls if self.calls else 0.0,
+            "max_queue_time": self.max_queue_time,
+        }
+
+
+password_pool = PasswordHashingPool(PASSWORD_HASH_WORKERS)
@@ -5,7 +5,7 @@ from click import password_option
 from typing_extensions import Self
 
 from fastapi_users import schemas
-from pydantic import BaseModel, EmailStr, field_serializer, model_validator, model_serializer
+from pydantic import BaseModel, EmailStr, TypeAdapter, field_serializer, model_validator, model_serializer
 
 from app.config import HOSTNAME
 from app.lesson import schemas as lesson_schemas
@@ -61,6 +61,16 @@ class PlannedLessonRead(BaseModel):
     lesson: lesson_schemas.LessonRead
 
 
+class PlannedLessonCompactRead(BaseModel):
+    id: int
+    timestamp: datetime
+    lesson_id: int
+
+
+PlannedLessonListAdapter = TypeAdapter(list[PlannedLessonRead])
+PlannedLessonCompactListAdapter = TypeAdapter(list[PlannedLessonCompactRead])
+
+
 class FavoriteCreate(BaseModel):
     lesson_id: int
 
@@ -0,0 +1,97 @@
+import time
+from collections import OrderedDict
+
+import jwt
+from fastapi_users import BaseUserManager, exceptions
+from fastapi_users.authentication import JWTStrategy
+from fastapi_users.jwt import decode_jwt
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.auth.models import User
+from app.config import USER_CACHE_SIZE, USER_CACHE_TTL
+
+USER_KEYS = tuple(User.__table__.c.keys())
+
+
+class UserCache:
+    """
+    LRU of user column snapshots keyed by id, each kept for at most ttl seconds.
+
+    Every hit builds a new detached User, so requests never share an instance and changes
+    made by a request are written by its own session. Updates made on other workers reach
+    this one when the entry expires.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> User | None:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(user_id, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+
+        user = User(**entry[1])
+        make_transient_to_detached(user)
+        return user
+
+    def set(self, user: User):
+        if self.ttl <= 0:
+            return
+        snapshot = {key: getattr(user, key) for key in USER_KEYS}
+        self._entries[user.id] = (time.monotonic() + self.ttl, snapshot)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class CachedJWTStrategy(JWTStrategy):
+    """JWT strategy that resolves the token subject through a UserCache before the database."""
+
+    def __init__(self, *args, user_cache: UserCache, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user_cache = user_cache
+
+    async def read_token(self, token: str | None, user_manager: BaseUserManager) -> User | None:
+        if token is None:
+            return None
+
+        try:
+            data = decode_jwt(token, self.decode_key, self.token_audience, algorithms=[self.algorithm])
+            user_id = data.get("sub")
+            if user_id is None:
+                return None
+            parsed_id = user_manager.parse_id(user_id)
+        except (jwt.PyJWTError, exceptions.InvalidID):
+            return None
+
+        user = self.user_cache.get(parsed_id)
+        if user is not None:
+            return user
+
+        try:
+            user = await user_manager.get(parsed_id)
+        except exceptions.UserNotExists:
+            return None
+        self.user_cache.set(user)
+        return user
+
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL)
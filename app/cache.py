@@ -0,0 +1,293 @@
+import asyncio
+import logging
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Collection, Hashable, Iterable
+
+import asyncpg
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.models import User
+from app.catalog.models import CatalogVersion
+from app.config import (CATALOG_CACHE_BACKEND, CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL, DB_USER, DB_PASS, DB_HOST,
+                        DB_PORT, DB_NAME)
+from app.database import async_session_maker
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "holiwell_catalog"
+# Keeps NOTIFY payloads well under the 8000 byte limit of Postgres
+USER_IDS_PER_MESSAGE = 250
+BACKEND_ERRORS = (OSError, asyncpg.PostgresError, asyncpg.InterfaceError, SQLAlchemyError)
+
+
+class LocalBackend:
+    """
+    Invalidation backend for a single worker: nothing to share, nothing to listen to.
+
+    Maintenance commands run in their own process and only bump the version in the database,
+    so on_connect is called again every poll_interval seconds to pick their changes up.
+    """
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+
+    async def publish(self, payload: str):
+        pass
+
+    async def run(self,
+                  on_message: Callable[[str], None],
+                  on_connect: Callable[[], Awaitable[None]],
+                  on_disconnect: Callable[[], None]):
+        while True:
+            try:
+                await on_connect()
+            except BACKEND_ERRORS:
+                logger.exception("Failed to reload the catalog version")
+            await asyncio.sleep(self.poll_interval)
+
+
+class PostgresBackend:
+    """
+    Shares invalidations between workers through Postgres LISTEN/NOTIFY.
+
+    While the listening connection is down notifications are missed, so on_disconnect is
+    called when it drops and on_connect again once listening has resumed.
+    """
+
+    def __init__(self, dsn: str, reconnect_interval: float = 5):
+        self.dsn = dsn
+        self.reconnect_interval = reconnect_interval
+        self._connection: asyncpg.Connection | None = None
+        self._publish_lock = asyncio.Lock()
+
+    async def publish(self, payload: str):
+        async with self._publish_lock:
+            connection = self._connection
+            if connection is None or connection.is_closed():
+                connection = await asyncpg.connect(self.dsn)
+            try:
+                await connection.execute("SELECT pg_notify($1, $2)", INVALIDATION_CHANNEL, payload)
+            finally:
+                if connection is not self._connection:
+                    await connection.close()
+
+    async def run(self,
+                  on_message: Callable[[str], None],
+                  on_connect: Callable[[], Awaitable[None]],
+                  on_disconnect: Callable[[], None]):
+        def listener(connection, pid, channel, payload):
+            on_message(payload)
+
+        while True:
+            try:
+                self._connection = await asyncpg.connect(self.dsn)
+                await self._connection.add_listener(INVALIDATION_CHANNEL, listener)
+                await on_connect()
+                while not self._connection.is_closed():
+                    await asyncio.sleep(self.reconnect_interval)
+            except BACKEND_ERRORS:
+                logger.exception("Catalog invalidation listener failed")
+            finally:
+                on_disconnect()
+                if self._connection is not None:
+                    await self._connection.close()
+                    self._connection = None
+            await asyncio.sleep(self.reconnect_interval)
+
+
+class CatalogCache:
+    """
+    Versioned in-memory cache of anonymous catalog reads.
+
+    The version is a counter in Postgres, so it is shared by all workers and survives restarts.
+    Every catalog mutation bumps it with bump_version() inside its transaction and passes the
+    new version to invalidate() after the commit, which drops the entries and tells other
+    workers through the backend. A result built while the version changed is returned but not
+    stored. Entries expire after ttl seconds, and view counter updates bump the version at most
+    once per ttl, which bounds how stale counters get. While the backend is not listening,
+    nothing is cached and get_etag() reads the version from the database on every call.
+
+    Per-user fields are not cached, but their changes bump the user's catalog_revision so
+    that get_etag() changes with them.
+    """
+
+    def __init__(self, backend, max_entries: int, ttl: float):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # None until loaded from the database, and again while notifications may be missed
+        self.version: int | None = None
+        self._listening = False
+        self._version_changed_at = time.monotonic()
+
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._locks = [asyncio.Lock() for _ in range(64)]
+        self._user_revisions: OrderedDict[int, int] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get_or_build(self, key: Hashable, build: Callable[[], Awaitable[Any]]) -> Any:
+        value = self._get(key)
+        if value is not None:
+            return value
+
+        # Requests for the same key wait for the first build instead of all hitting the database
+        async with self._locks[hash(key) % len(self._locks)]:
+            value = self._get(key)
+            if value is not None:
+                return value
+
+            self.misses += 1
+            version = self.version
+            value = await build()
+            if self._listening and version is not None and version == self.version:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return value
+
+    def _get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def bump_version(self, db: AsyncSession) -> int:
+        # The row stays locked until the caller commits, so versions are committed in order
+        db_result = await db.execute(update(CatalogVersion).
+                                     values(version=CatalogVersion.version + 1).
+                                     returning(CatalogVersion.version))
+        return db_result.scalar_one()
+
+    def counters_stale(self) -> bool:
+        return time.monotonic() - self._version_changed_at >= self.ttl
+
+    async def invalidate(self, version: int):
+        self.invalidate_local(version)
+        await self._publish(f"catalog:{version}")
+
+    def invalidate_local(self, version: int):
+        # Notifications may arrive out of commit order, an older version changes nothing
+        if self.version is not None and version <= self.version:
+            return
+        self.version = version
+        self._version_changed_at = time.monotonic()
+        self.invalidations += 1
+        self._entries.clear()
+
+    async def bump_user_revisions(self, user_ids: Iterable[int], db: AsyncSession) -> dict[int, int]:
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return {}
+        # Locked in id order first, an UPDATE would lock them in plan order and concurrent flushes could deadlock
+        await db.execute(select(User.id).
+                         where(User.id.in_(user_ids)).
+                         order_by(User.id).
+                         with_for_update(key_share=True))
+        db_result = await db.execute(update(User).
+                                     where(User.id.in_(user_ids)).
+                                     values(catalog_revision=User.catalog_revision + 1).
+                                     returning(User.id, User.catalog_revision))
+        return dict(db_result.tuples().all())
+
+    async def invalidate_users(self, revisions: dict[int, int]):
+        self.invalidate_users_local(revisions)
+        items = [f"{user_id}.{revision}" for user_id, revision in revisions.items()]
+        for start in range(0, len(items), USER_IDS_PER_MESSAGE):
+            await self._publish(f"users:{','.join(items[start:start + USER_IDS_PER_MESSAGE])}")
+
+    def invalidate_users_local(self, revisions: dict[int, int]):
+        for user_id, revision in revisions.items():
+            self._set_user_revision(user_id, max(revision, self._user_revisions.get(user_id, 0)))
+
+    def _set_user_revision(self, user_id: int, revision: int):
+        self._user_revisions[user_id] = revision
+        self._user_revisions.move_to_end(user_id)
+        while len(self._user_revisions) > self.max_entries:
+            self._user_revisions.popitem(last=False)
+
+    async def get_etag(self, db: AsyncSession, user_id: int | None = None, pending_views: Collection[int] = ()) -> str:
+        # The database is only read while the backend is not listening and for users not seen lately
+        if self.version is None or not self._listening:
+            await self._load_version(db)
+        if user_id is None:
+            return f'"{self.version}-0"'
+
+        revision = self._user_revisions.get(user_id)
+        if revision is None or not self._listening:
+            db_revision = await db.execute(select(User.catalog_revision).where(User.id == user_id))
+            revision = db_revision.scalar() or 0
+        self._set_user_revision(user_id, revision)
+
+        user = f"{user_id}.{revision}"
+        # Buffered views are shown before their flush bumps the revision, and differ between workers
+        if pending_views:
+            user += f".{zlib.crc32(','.join(map(str, sorted(pending_views))).encode()):x}"
+        return f'"{self.version}-{user}"'
+
+    async def _load_version(self, db: AsyncSession):
+        db_version = await db.execute(select(CatalogVersion.version))
+        self.invalidate_local(db_version.scalar_one())
+
+    async def reload(self):
+        # Called whenever the backend starts listening: anything sent before may have been missed
+        self._user_revisions.clear()
+        async with async_session_maker() as session:
+            await self._load_version(session)
+        self._listening = True
+
+    def forget(self):
+        # Called when the backend stops listening, until reload() every read goes to the database
+        self._listening = False
+        self.version = None
+        self._entries.clear()
+        self._user_revisions.clear()
+
+    def handle_message(self, payload: str):
+        # Payloads are "catalog:<version>" and "users:<user id>.<revision>,..."
+        kind, _, data = payload.partition(":")
+        if kind == "catalog":
+            self.invalidate_local(int(data))
+        elif kind == "users":
+            revisions = (item.split(".") for item in data.split(","))
+            self.invalidate_users_local({int(user_id): int(revision) for user_id, revision in revisions})
+
+    async def _publish(self, payload: str):
+        try:
+            await self.backend.publish(payload)
+        except BACKEND_ERRORS:
+            logger.exception("Failed to publish catalog invalidation")
+
+    async def run(self):
+        await self.backend.run(self.handle_message, self.reload, self.forget)
+
+    def get_stats(self) -> dict:
+        return {
+            "version": self.version,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "tracked_users": len(self._user_revisions),
+        }
+
+
+def _create_backend():
+    if CATALOG_CACHE_BACKEND == "postgres":
+        return PostgresBackend(f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
+    return LocalBackend(max(CATALOG_CACHE_TTL, 1))
+
+
+catalog_cache = CatalogCache(_create_backend(), CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL)
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, BigInteger
+
+from app.database import Base
+
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_version"
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default='0')
@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+
+from app.database import async_session_maker
+from app.lesson.crud import backfill_media_lengths
+from app.tasks import collect_upload_sessions, repair_view_counters
+
+
+async def backfill_media_length():
+    async with async_session_maker() as session:
+        updated = await backfill_media_lengths(session)
+    print(f"Media length has been stored for {updated} lessons.")
+
+
+async def collect_expired_uploads():
+    deleted = await collect_upload_sessions()
+    print(f"Chunks of {deleted} expired upload sessions have been deleted.")
+
+
+async def reconcile_views():
+    repaired = await repair_view_counters()
+    print(f"View counters have been repaired for {repaired} lessons and courses.")
+
+
+COMMANDS = {
+    'backfill-media-length': backfill_media_length,
+    'collect-expired-uploads': collect_expired_uploads,
+    'reconcile-views': reconcile_views,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Holiwell maintenance commands')
+    parser.add_argument('command', choices=COMMANDS)
+    args = parser.parse_args()
+    asyncio.run(COMMANDS[args.command]())
+
+
+if __name__ == "__main__":
+    main()
@@ -10,8 +10,32 @@ DB_PASS = os.environ.get("DB_PASS")
 DB_HOST = os.environ.get("DB_HOST")
 DB_PORT = os.environ.get("DB_PORT")
 DB_NAME = os.environ.get("DB_NAME")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 30 * 60))
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 500))
 
 SECRET_AUTH = os.environ.get("SECRET_AUTH")
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 10000))
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", 30))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+
+VIEW_BUFFER_SIZE = int(os.environ.get("VIEW_BUFFER_SIZE", 500))
+VIEW_BUFFER_FLUSH_INTERVAL = float(os.environ.get("VIEW_BUFFER_FLUSH_INTERVAL", 1))
+VIEW_COUNTER_RECONCILE_INTERVAL = int(os.environ.get("VIEW_COUNTER_RECONCILE_INTERVAL", 24 * 60 * 60))
+
+CATALOG_CACHE_BACKEND = os.environ.get("CATALOG_CACHE_BACKEND", "local")
+CATALOG_CACHE_SIZE = int(os.environ.get("CATALOG_CACHE_SIZE", 1024))
+CATALOG_CACHE_TTL = float(os.environ.get("CATALOG_CACHE_TTL", 60))
+
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_CACHE_SIZE = int(os.environ.get("COMPRESSION_CACHE_SIZE", 128))
+
+MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_SIZE", 2 * 1024 ** 3))
+MAX_UPLOAD_CHUNK_SIZE = int(os.environ.get("MAX_UPLOAD_CHUNK_SIZE", 64 * 1024 ** 2))
+UPLOAD_SESSION_TTL = int(os.environ.get("UPLOAD_SESSION_TTL", 24 * 60 * 60))
+UPLOAD_SESSION_GC_INTERVAL = int(os.environ.get("UPLOAD_SESSION_GC_INTERVAL", 60 * 60))
 
 MAIL_USERNAME = os.environ.get("MAIL_USERNAME")
 MAIL_PASSWORD = os.environ.get("MAIL_PASSWORD")
@@ -23,5 +47,10 @@ MAIL_STARTTLS = os.environ.get("MAIL_STARTTLS")
 MAIL_SSL_TLS = os.environ.get("MAIL_SSL_TLS")
 USE_CREDENTIALS = os.environ.get("USE_CREDENTIALS")
 VALIDATE_CERTS = os.environ.get("VALIDATE_CERTS")
+MAIL_OUTBOX_SIZE = int(os.environ.get("MAIL_OUTBOX_SIZE", 1000))
+MAIL_BATCH_SIZE = int(os.environ.get("MAIL_BATCH_SIZE", 20))
+MAIL_MAX_ATTEMPTS = int(os.environ.get("MAIL_MAX_ATTEMPTS", 5))
+MAIL_RETRY_DELAY = float(os.environ.get("MAIL_RETRY_DELAY", 5))
+MAIL_IDLE_TIMEOUT = float(os.environ.get("MAIL_IDLE_TIMEOUT", 30))
 
 SERVER_URL = os.environ.get("SERVER_URL")
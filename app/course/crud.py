@@ -1,82 +1,133 @@
 from fastapi import UploadFile
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from app.cache import catalog_cache
 from app.course import models, schemas
 from app.lesson import models as lesson_models
-from app.lesson.crud import (get_links_before_by_lesson, get_links_after_by_lesson, get_number_of_views,
-                             is_viewed, is_favorite)
+from app.lesson.crud import get_lessons_by_courses, mark_lessons
 from app.utils import upload_file, delete_file
 
 
 async def create_course_type(course_type: schemas.CourseTypeCreate, user_id: int | None, db: AsyncSession):
     course_type_dict = course_type.model_dump()
     db_course_type = models.CourseType(**course_type_dict)
-    db_course_types = await get_course_types(user_id, None, db)
 
-    db_course_types_slugs = [item.slug for item in db_course_types]
-    if db_course_type.slug in db_course_types_slugs:
+    db_slug = await db.execute(select(models.CourseType.id).where(models.CourseType.slug == db_course_type.slug))
+    if db_slug.scalar() is not None:
         return
 
     db.add(db_course_type)
 
+    version = await catalog_cache.bump_version(db)
     await db.commit()
+    await catalog_cache.invalidate(version)
     return db_course_type
 
 
-async def get_course_types(user_id: int | None, sort_by: str | None, db: AsyncSession):
-    db_course_type = await db.execute(select(models.CourseType).limit(1000))
-    obj_course_types = db_course_type.scalars().all()
+async def get_course_types(user_id: int | None, sort_by: str | None, db: AsyncSession, compact: bool = False):
+    course_types = await catalog_cache.get_or_build(('course_types', sort_by, compact),
+                                                    lambda: _get_all_course_types(sort_by, db, compact))
+    if compact:
+        return course_types
+    return await _mark_course_types(course_types, user_id, db)
+
+
+async def _get_all_course_types(sort_by: str | None, db: AsyncSession, compact: bool = False):
+    db_course_types = await db.execute(select(*models.CourseType.__table__.c).
+                                       order_by(models.CourseType.id).
+                                       limit(1000))
+    course_types = [dict(row) for row in db_course_types.mappings()]
+    return await _build_course_types(course_types, sort_by, db, compact)
+
+
+async def get_course_type(course_type_slug: str,
+                          user_id: int | None,
+                          sort_by: str | None,
+                          db: AsyncSession,
+                          compact: bool = False):
+    course_type = await catalog_cache.get_or_build(('course_type', course_type_slug, sort_by, compact),
+                                                   lambda: _get_course_type(course_type_slug, sort_by, db, compact))
+    if course_type is None or compact:
+        return course_type
+    course_types = await _mark_course_types([course_type], user_id, db)
+    return course_types[0]
+
+
+async def _get_course_type(course_type_slug: str, sort_by: str | None, db: AsyncSession, compact: bool = False):
+    db_course_type = await db.execute(select(*models.CourseType.__table__.c).
+                                      where(models.CourseType.slug == course_type_slug))
+    course_type = db_course_type.mappings().first()
+    if not course_type:
+        return
 
-    for obj_course_type in obj_course_types:
-        for course in obj_course_type.courses:
-            course.course_type_slug = obj_course_type.slug
-            course.course_type_id = obj_course_type.id
-            course.number_of_views = 0
+    course_types = await _build_course_types([dict(course_type)], sort_by, db, compact)
+    return course_types[0]
 
-            for lesson in course.lessons:
-                lesson.links_before = await get_links_before_by_lesson(lesson.id, db)
-                lesson.links_after = await get_links_after_by_lesson(lesson.id, db)
-                lesson.course_type_slug = obj_course_type.slug
-                lesson.number_of_views = await get_number_of_views(lesson.id, db)
-                lesson.is_viewed = await is_viewed(lesson.id, user_id, db)
-                lesson.is_favorite = await is_favorite(lesson.id, user_id, db)
-                course.number_of_views += lesson.number_of_views
 
-            if sort_by is None or sort_by == "new":
-                course.lessons = sorted(course.lessons, key=lambda x: -x.id)
-            elif sort_by == "popular":
-                course.lessons = sorted(course.lessons, key=lambda x: -x.number_of_views)
+async def _build_course_types(course_types: list[dict],
+                              sort_by: str | None,
+                              db: AsyncSession,
+                              compact: bool = False):
+    course_type_ids = [course_type['id'] for course_type in course_types]
+    if not course_type_ids:
+        return course_types
 
-    return sorted(obj_course_types, key=lambda x: x.id)
+    db_courses = await db.execute(_select_courses(compact).
+                                  where(models.Course.course_type_id.in_(course_type_ids)).
+                                  order_by(models.Course.id))
+    courses = {}
+    for course in await _hydrate_courses(db_courses.mappings().all(), sort_by, db, compact):
+        courses.setdefault(course['course_type_id'], []).append(course)
+    for course_type in course_types:
+        course_type['courses'] = courses.get(course_type['id'], [])
 
+    return course_types
 
-async def get_course_type(course_type_slug: str, user_id: int | None, sort_by: str | None, db: AsyncSession):
-    db_course_type = await db.execute(select(models.CourseType).where(models.CourseType.slug == course_type_slug))
-    obj_course_type = db_course_type.scalar()
-    if not obj_course_type:
-        return
 
-    for course in obj_course_type.courses:
-        course.course_type_slug = obj_course_type.slug
-        course.course_type_id = obj_course_type.id
-        course.number_of_views = 0
+def _select_courses(compact: bool = False):
+    if compact:
+        return select(models.Course.id, models.Course.title, models.Course.course_type_id,
+                      models.Course.path_to_cover, models.Course.number_of_views)
+
+    # Rows are (*course columns, course_type_slug)
+    return (
+        select(*models.Course.__table__.c, models.CourseType.slug.label('course_type_slug'))
+        .outerjoin(models.CourseType, models.CourseType.id == models.Course.course_type_id)
+    )
+
+
+async def _hydrate_courses(rows,
+                           sort_by: str | None,
+                           db: AsyncSession,
+                           compact: bool = False) -> list[dict]:
+    courses = [dict(row) for row in rows]
+
+    lessons = await get_lessons_by_courses([course['id'] for course in courses], sort_by, db, compact)
+    for course in courses:
+        course['lessons'] = lessons.get(course['id'], [])
+
+    return courses
 
-        for lesson in course.lessons:
-            lesson.links_before = await get_links_before_by_lesson(lesson.id, db)
-            lesson.links_after = await get_links_after_by_lesson(lesson.id, db)
-            lesson.course_type_slug = obj_course_type.slug
-            lesson.number_of_views = await get_number_of_views(lesson.id, db)
-            lesson.is_viewed = await is_viewed(lesson.id, user_id, db)
-            lesson.is_favorite = await is_favorite(lesson.id, user_id, db)
-            course.number_of_views += lesson.number_of_views
 
-        if sort_by is None or sort_by == "new":
-            course.lessons = sorted(course.lessons, key=lambda x: -x.id)
-        elif sort_by == "popular":
-            course.lessons = sorted(course.lessons, key=lambda x: -x.number_of_views)
+async def _mark_course_types(course_types: list[dict], user_id: int | None, db: AsyncSession) -> list[dict]:
+    if user_id is None:
+        return course_types
 
-    return obj_course_type
+    courses = iter(await _mark_courses([course for course_type in course_types for course in course_type['courses']],
+                                       user_id, db))
+    return [{**course_type, 'courses': [next(courses) for _ in course_type['courses']]}
+            for course_type in course_types]
+
+
+async def _mark_courses(courses: list[dict], user_id: int | None, db: AsyncSession) -> list[dict]:
+    # Cached courses are shared between requests, so the user's lessons go into copies
+    if user_id is None:
+        return courses
+
+    lessons = iter(await mark_lessons([lesson for course in courses for lesson in course['lessons']], user_id, db))
+    return [{**course, 'lessons': [next(lessons) for _ in course['lessons']]} for course in courses]
 
 
 async def create_course(course: schemas.CourseCreate,
@@ -87,11 +138,13 @@ async def create_course(course: schemas.CourseCreate,
     if not db_course_type:
         return
 
-    course_dict['path_to_cover'] = upload_file('courses/cover', cover, cover.filename)
+    course_dict['path_to_cover'] = await upload_file('courses/cover', cover, cover.filename)
     db_course = models.Course(**course_dict)
     db.add(db_course)
 
+    version = await catalog_cache.bump_version(db)
     await db.commit()
+    await catalog_cache.invalidate(version)
     return db_course
 
 
@@ -102,55 +155,37 @@ async def get_lessons_by_course(course_id: int, db: AsyncSession):
 
 
 async def get_course(course_id: int, user_id: int | None, sort_by: str | None, db: AsyncSession):
-    db_course = await db.get(models.Course, course_id)
-    if not db_course:
+    course = await catalog_cache.get_or_build(('course', course_id, sort_by), lambda: _get_course(course_id, sort_by, db))
+    if course is None:
         return
+    courses = await _mark_courses([course], user_id, db)
+    return courses[0]
 
-    db_course.course_type_slug = db_course.course_type.slug
-    db_course.course_type_id = db_course.course_type.id
-    db_course.number_of_views = 0
-    for lesson in db_course.lessons:
-        lesson.course_type_slug = db_course.course_type.slug
-        lesson.links_before = await get_links_before_by_lesson(lesson.id, db)
-        lesson.links_after = await get_links_after_by_lesson(lesson.id, db)
-        lesson.course_type_slug = lesson.course.course_type.slug if lesson.course is not None else None
-        lesson.number_of_views = await get_number_of_views(lesson.id, db)
-        lesson.is_viewed = await is_viewed(lesson.id, user_id, db)
-        lesson.is_favorite = await is_favorite(lesson.id, user_id, db)
-        db_course.number_of_views += lesson.number_of_views
-
-    if sort_by is None or sort_by == "new":
-        db_course.lessons = sorted(db_course.lessons, key=lambda x: -x.id)
-    elif sort_by == "popular":
-        db_course.lessons = sorted(db_course.lessons, key=lambda x: -x.number_of_views)
 
-    return db_course
+async def _get_course(course_id: int, sort_by: str | None, db: AsyncSession):
+    db_course = await db.execute(_select_courses().where(models.Course.id == course_id))
+    courses = await _hydrate_courses(db_course.mappings().all(), sort_by, db)
+    if not courses:
+        return
+    return courses[0]
 
 
-async def get_courses(user_id: int | None, sort_by: str | None, db: AsyncSession):
-    db_courses = await db.execute(select(models.Course).limit(1000))
-    obj_courses = db_courses.scalars().all()
+async def get_courses(user_id: int | None, sort_by: str | None, db: AsyncSession, compact: bool = False):
+    courses = await catalog_cache.get_or_build(('courses', sort_by, compact), lambda: _get_courses(sort_by, db, compact))
+    if compact:
+        return courses
+    return await _mark_courses(courses, user_id, db)
 
-    for obj in obj_courses:
-        obj.course_type_slug = obj.course_type.slug
-        obj.course_type_id = obj.course_type.id
-        obj.number_of_views = 0
-        for lesson in obj.lessons:
-            lesson.course_type_slug = obj.course_type.slug
-            lesson.links_before = await get_links_before_by_lesson(lesson.id, db)
-            lesson.links_after = await get_links_after_by_lesson(lesson.id, db)
-            lesson.course_type_slug = obj.course_type.slug
-            lesson.number_of_views = await get_number_of_views(lesson.id, db)
-            lesson.is_viewed = await is_viewed(lesson.id, user_id, db)
-            lesson.is_favorite = await is_favorite(lesson.id, user_id, db)
-            obj.number_of_views += lesson.number_of_views
 
-    if sort_by is None or sort_by == "new":
-        obj_courses = sorted(obj_courses, key=lambda x: -x.id)
-    elif sort_by == "popular":
-        obj_courses = sorted(obj_courses, key=lambda x: -x.number_of_views)
+async def _get_courses(sort_by: str | None, db: AsyncSession, compact: bool = False):
+    query = _select_courses(compact)
+    if sort_by == "popular":
+        query = query.order_by(models.Course.number_of_views.desc(), models.Course.id.desc())
+    else:
+        query = query.order_by(models.Course.id.desc())
 
-    return obj_courses
+    db_courses = await db.execute(query.limit(1000))
+    return await _hydrate_courses(db_courses.mappings().all(), sort_by, db, compact)
 
 
 async def update_course(course_id: int,
@@ -168,19 +203,21 @@ async def update_course(course_id: int,
             return 'no_course_type'
 
     if cover:
+        course_dict['path_to_cover'] = await upload_file('courses/cover', cover, cover.filename)
         if db_course.path_to_cover:
             delete_file(db_course.path_to_cover)
-        course_dict['path_to_cover'] = upload_file('courses/cover', cover, cover.filename)
 
     for key, value in course_dict.items():
         setattr(db_course, key, value)
 
+    version = await catalog_cache.bump_version(db)
     await db.commit()
+    await catalog_cache.invalidate(version)
     return db_course
 
 
 async def delete_course(course_id: int, db: AsyncSession):
-    db_lesson = await db.get(models.Course, course_id)
+    db_lesson = await db.get(models.Course, course_id, options=[selectinload(models.Course.lessons)])
     if not db_lesson:
         return
 
@@ -190,5 +227,7 @@ async def delete_course(course_id: int, db: AsyncSession):
         pass
 
     await db.delete(db_lesson)
+    version = await catalog_cache.bump_version(db)
     await db.commit()
+    await catalog_cache.invalidate(version)
     return True
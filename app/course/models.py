@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -6,15 +6,19 @@ from app.database import Base
 
 class Course(Base):
     __tablename__ = "course"
+    __table_args__ = (
+        Index('ix_course_number_of_views_id', 'number_of_views', 'id'),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String)
     description = Column(String)
     path_to_cover = Column(String)
+    number_of_views = Column(Integer, nullable=False, default=0, server_default='0')
 
     course_type_id = Column(Integer, ForeignKey("course_type.id"))
-    course_type = relationship("CourseType", back_populates="courses", lazy='selectin')
+    course_type = relationship("CourseType", back_populates="courses", lazy='raise')
 
-    lessons = relationship("Lesson", back_populates="course", lazy='selectin')
+    lessons = relationship("Lesson", back_populates="course", lazy='raise')
 
 
 class CourseType(Base):
@@ -22,4 +26,4 @@ class CourseType(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     slug = Column(String, unique=True)
 
-    courses = relationship("Course", back_populates="course_type", lazy='selectin')
+    courses = relationship("Course", back_populates="course_type", lazy='raise')
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, field_serializer
+from pydantic import BaseModel, TypeAdapter, field_serializer
 
 from app.config import HOSTNAME
 from app.lesson import schemas as lesson_schemas
@@ -25,6 +25,23 @@ class CourseRead(BaseModel):
         return HOSTNAME + path
 
 
+class CourseSummary(BaseModel):
+    id: int
+    title: str
+    course_type_id: int | None
+    path_to_cover: str
+    number_of_views: int
+    lessons: list[lesson_schemas.LessonSummary]
+
+    @field_serializer('path_to_cover')
+    def add_hostname(self, path: str) -> str:
+        return HOSTNAME + path
+
+
+CourseListAdapter = TypeAdapter(list[CourseRead])
+CourseSummaryListAdapter = TypeAdapter(list[CourseSummary])
+
+
 class CourseUpdate(BaseModel):
     title: str | None
     description: str | None
@@ -39,3 +56,15 @@ class CourseTypeRead(BaseModel):
     id: int
     slug: str
     courses: list[CourseRead]
+
+
+class CourseTypeSummary(BaseModel):
+    id: int
+    slug: str
+    courses: list[CourseSummary]
+
+
+CourseTypeAdapter = TypeAdapter(CourseTypeRead)
+CourseTypeListAdapter = TypeAdapter(list[CourseTypeRead])
+CourseTypeSummaryAdapter = TypeAdapter(CourseTypeSummary)
+CourseTypeSummaryListAdapter = TypeAdapter(list[CourseTypeSummary])
@@ -1,13 +1,49 @@
+import time
+
 from sqlalchemy import MetaData
+from sqlalchemy.exc import TimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .config import (DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+                     DB_POOL_RECYCLE, DB_STATEMENT_CACHE_SIZE)
+
+SQLALCHEMY_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
 
-from .config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long requests wait to check out a connection."""
 
-SQLALCHEMY_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}?async_fallback=True"
+    checkouts = 0
+    timeouts = 0
+    wait_time = 0.0
+    max_wait_time = 0.0
 
-engine = create_async_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            InstrumentedPool.timeouts += 1
+            raise
+        finally:
+            wait_time = time.perf_counter() - start
+            InstrumentedPool.checkouts += 1
+            InstrumentedPool.wait_time += wait_time
+            InstrumentedPool.max_wait_time = max(InstrumentedPool.max_wait_time, wait_time)
+
+
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL,
+    poolclass=InstrumentedPool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    connect_args={"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
 
@@ -21,3 +57,18 @@ metadata = MetaData()
 async def get_async_session() -> AsyncSession | None:
     async with async_session_maker() as session:
         yield session
+
+
+def get_pool_stats() -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checkouts": InstrumentedPool.checkouts,
+        "timeouts": InstrumentedPool.timeouts,
+        "average_wait_ms": InstrumentedPool.wait_time / InstrumentedPool.checkouts * 1000
+        if InstrumentedPool.checkouts else 0.0,
+        "max_wait_ms": InstrumentedPool.max_wait_time * 1000,
+    }
@@ -1,12 +1,25 @@
 from fastapi import UploadFile
-from sqlalchemy import select, func, and_
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update, func, and_, or_, true, false, tuple_, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Load, selectinload
 
 from app.lesson import models, schemas
 from app.auth import models as auth_models
+from app.auth.buffer import view_buffer
+from app.cache import catalog_cache
+from app.course import models as course_models
 from app.trainer import models as trainer_models
-from app.trainer.crud import get_trainer
-from app.utils import upload_file, delete_file
+from app.utils import upload_file, delete_file, encode_cursor, get_file_length
+
+
+# Catalog reads select plain columns and build dicts for the response schemas instead of ORM entities
+LESSON_COLUMNS = tuple(models.Lesson.__table__.c)
+LESSON_KEYS = tuple(column.key for column in LESSON_COLUMNS)
+TRAINER_KEYS = tuple(trainer_models.Trainer.__table__.c.keys())
+TRAINER_COLUMNS = tuple(column.label(f'trainer_{column.key}') for column in trainer_models.Trainer.__table__.c)
+LESSON_SUMMARY_COLUMNS = (models.Lesson.id, models.Lesson.title, models.Lesson.course_id,
+                          models.Lesson.path_to_cover, models.Lesson.number_of_views)
 
 
 async def create_lesson(lesson: schemas.LessonCreate,
@@ -19,54 +32,202 @@ async def create_lesson(lesson: schemas.LessonCreate,
     if not db_trainer:
         return 'no_trainer'
 
-    lesson_dict['path_to_cover'] = upload_file('lessons/cover', cover, cover.filename) if cover else None
-    lesson_dict['path_to_video'] = upload_file('lessons/video', video, video.filename) if video else None
-    lesson_dict['path_to_audio'] = upload_file('lessons/audio', audio, audio.filename) if audio else None
+    lesson_dict['path_to_cover'] = await upload_file('lessons/cover', cover, cover.filename) if cover else None
+    lesson_dict['path_to_video'] = await upload_file('lessons/video', video, video.filename) if video else None
+    lesson_dict['path_to_audio'] = await upload_file('lessons/audio', audio, audio.filename) if audio else None
+    lesson_dict['video_length'] = await run_in_threadpool(get_file_length, lesson_dict['path_to_video'])
+    lesson_dict['audio_length'] = await run_in_threadpool(get_file_length, lesson_dict['path_to_audio'])
 
     db_lesson = models.Lesson(**lesson_dict)
     db.add(db_lesson)
 
+    version = await catalog_cache.bump_version(db)
     await db.commit()
+    await catalog_cache.invalidate(version)
     return db_lesson
 
 
 async def get_lesson(lesson_id: int, user_id: int | None, db: AsyncSession):
-    db_lesson = await db.get(models.Lesson, lesson_id)
-    if not db_lesson:
+    lesson = await catalog_cache.get_or_build(('lesson', lesson_id), lambda: _get_lesson(lesson_id, db))
+    if lesson is None:
         return
+    lessons = await mark_lessons([lesson], user_id, db)
+    return lessons[0]
 
-    db_lesson.course_type_slug = db_lesson.course.course_type.slug if db_lesson.course is not None else None
-    db_lesson.trainer = await get_trainer(db_lesson.trainer_id, db)
-    db_lesson.links_before = await get_links_before_by_lesson(lesson_id, db)
-    db_lesson.links_after = await get_links_after_by_lesson(lesson_id, db)
-    db_lesson.number_of_views = await get_number_of_views(lesson_id, db)
-    db_lesson.is_viewed = await is_viewed(lesson_id, user_id, db)
-    db_lesson.is_favorite = await is_favorite(lesson_id, user_id, db)
-
-    return db_lesson
-
-
-async def get_lessons(sort_by: str | None, user_id: int | None, course_type_slug: str | None, db: AsyncSession):
-    db_lessons = await db.execute(select(models.Lesson))
-    obj_lessons = db_lessons.scalars().all()
-
-    for obj in obj_lessons:
-        obj.course_type_slug = obj.course.course_type.slug if obj.course is not None else None
-        obj.trainer = await get_trainer(obj.trainer_id, db)
-        obj.links_before = await get_links_before_by_lesson(obj.id, db)
-        obj.links_after = await get_links_after_by_lesson(obj.id, db)
-        obj.number_of_views = await get_number_of_views(obj.id, db)
-        obj.is_viewed = await is_viewed(obj.id, user_id, db)
-        obj.is_favorite = await is_favorite(obj.id, user_id, db)
-
-    if sort_by is None or sort_by == "new":
-        obj_lessons = sorted(obj_lessons, key=lambda x: -x.id)
-    elif sort_by == "popular":
-        obj_lessons = sorted(obj_lessons, key=lambda x: -x.number_of_views)
 
+async def _get_lesson(lesson_id: int, db: AsyncSession):
+    db_lessons = await db.execute(_select_lessons().where(models.Lesson.id == lesson_id))
+    obj_lessons = await _hydrate_lessons(db_lessons.all(), db)
+    if not obj_lessons:
+        return
+    return obj_lessons[0]
+
+
+async def get_lessons_by_ids(lesson_ids: list[int], user_id: int | None, db: AsyncSession):
+    if not lesson_ids:
+        return []
+
+    db_lessons = await db.execute(_select_lessons().where(models.Lesson.id.in_(lesson_ids)))
+    lessons = {lesson['id']: lesson for lesson in await _hydrate_lessons(db_lessons.all(), db)}
+    return await mark_lessons([lessons[lesson_id] for lesson_id in lesson_ids if lesson_id in lessons], user_id, db)
+
+
+async def get_lessons(sort_by: str | None,
+                      user_id: int | None,
+                      course_type_slug: str | None,
+                      db: AsyncSession,
+                      limit: int | None = None,
+                      after: list[int] | None = None,
+                      compact: bool = False):
+    if after is None:
+        # Only first pages are cached, cursors come from clients and would grow the cache without bound
+        lessons, next_cursor = await catalog_cache.get_or_build(
+            ('lessons', sort_by, course_type_slug, limit, compact),
+            lambda: _get_lessons(sort_by, course_type_slug, db, limit, after, compact)
+        )
+    else:
+        lessons, next_cursor = await _get_lessons(sort_by, course_type_slug, db, limit, after, compact)
+    if compact:
+        return lessons, next_cursor
+    return await mark_lessons(lessons, user_id, db), next_cursor
+
+
+async def _get_lessons(sort_by: str | None,
+                       course_type_slug: str | None,
+                       db: AsyncSession,
+                       limit: int | None = None,
+                       after: list[int] | None = None,
+                       compact: bool = False):
+    query = select(*LESSON_SUMMARY_COLUMNS) if compact else _select_lessons()
     if course_type_slug:
-        obj_lessons = list(filter(lambda x: x.course_type_slug == course_type_slug, obj_lessons))
-    return obj_lessons
+        query = query.where(models.Lesson.course_id.in_(
+            select(course_models.Course.id).
+            join(course_models.CourseType, course_models.CourseType.id == course_models.Course.course_type_id).
+            where(course_models.CourseType.slug == course_type_slug)
+        ))
+
+    order = _lesson_order(sort_by)
+    if after is not None:
+        query = query.where(tuple_(*order) < tuple_(*after))
+    query = query.order_by(*(column.desc() for column in order))
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    db_lessons = await db.execute(query)
+    rows = db_lessons.all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([last.number_of_views, last.id] if sort_by == "popular" else [last.id])
+
+    if compact:
+        return [dict(row._mapping) for row in rows], next_cursor
+    lessons = await _hydrate_lessons(rows, db)
+    return lessons, next_cursor
+
+
+async def get_lessons_by_courses(course_ids: list[int],
+                                 sort_by: str | None,
+                                 db: AsyncSession,
+                                 compact: bool = False):
+    if not course_ids:
+        return {}
+
+    query = select(*LESSON_SUMMARY_COLUMNS) if compact else _select_lessons()
+    query = query.where(models.Lesson.course_id.in_(course_ids))
+    query = query.order_by(*(column.desc() for column in _lesson_order(sort_by)))
+    db_lessons = await db.execute(query)
+
+    if compact:
+        obj_lessons = [dict(row) for row in db_lessons.mappings()]
+    else:
+        obj_lessons = await _hydrate_lessons(db_lessons.all(), db)
+
+    lessons = {}
+    for lesson in obj_lessons:
+        lessons.setdefault(lesson['course_id'], []).append(lesson)
+    return lessons
+
+
+async def mark_lessons(lessons: list[dict], user_id: int | None, db: AsyncSession) -> list[dict]:
+    """Overlay is_viewed and is_favorite of the user on copies of catalog lessons."""
+    if user_id is None or not lessons:
+        return lessons
+
+    viewed, favorite = await get_user_marks(user_id, {lesson['id'] for lesson in lessons}, db)
+    return [{**lesson, 'is_viewed': lesson['id'] in viewed, 'is_favorite': lesson['id'] in favorite}
+            for lesson in lessons]
+
+
+async def get_user_marks(user_id: int, lesson_ids: set[int], db: AsyncSession) -> tuple[set[int], set[int]]:
+    db_marks = await db.execute(union_all(
+        select(auth_models.View.lesson_id, true().label('is_view')).
+        where(and_(auth_models.View.user_id == user_id, auth_models.View.lesson_id.in_(lesson_ids))),
+        select(auth_models.Favorite.lesson_id, false().label('is_view')).
+        where(and_(auth_models.Favorite.user_id == user_id, auth_models.Favorite.lesson_id.in_(lesson_ids)))
+    ))
+
+    viewed = view_buffer.get_pending_lessons(user_id) & lesson_ids
+    favorite = set()
+    for lesson_id, is_view in db_marks.all():
+        (viewed if is_view else favorite).add(lesson_id)
+    return viewed, favorite
+
+
+def _lesson_order(sort_by: str | None) -> tuple:
+    if sort_by == "popular":
+        return models.Lesson.number_of_views, models.Lesson.id
+    return models.Lesson.id,
+
+
+def _select_lessons():
+    # Rows are (*lesson columns, *trainer columns, course_type_slug)
+    return (
+        select(*LESSON_COLUMNS,
+               *TRAINER_COLUMNS,
+               course_models.CourseType.slug.label('course_type_slug'))
+        .select_from(models.Lesson)
+        .outerjoin(trainer_models.Trainer, trainer_models.Trainer.id == models.Lesson.trainer_id)
+        .outerjoin(course_models.Course, course_models.Course.id == models.Lesson.course_id)
+        .outerjoin(course_models.CourseType, course_models.CourseType.id == course_models.Course.course_type_id)
+    )
+
+
+async def _hydrate_lessons(rows, db: AsyncSession) -> list[dict]:
+    # Lessons are built as the anonymous user sees them, mark_lessons() adds the per-user fields
+    lessons = []
+    for row in rows:
+        lesson = dict(zip(LESSON_KEYS, row))
+        trainer = dict(zip(TRAINER_KEYS, row[len(LESSON_KEYS):]))
+        lesson['trainer'] = trainer if trainer['id'] is not None else None
+        lesson['course_type_slug'] = row[-1]
+        lesson['is_viewed'] = False
+        lesson['is_favorite'] = False
+        lessons.append(lesson)
+
+    lesson_ids = [lesson['id'] for lesson in lessons]
+    links_before = await _get_links_by_lessons(models.LinkBeforeLesson, lesson_ids, db)
+    links_after = await _get_links_by_lessons(models.LinkAfterLesson, lesson_ids, db)
+    for lesson in lessons:
+        lesson['links_before'] = links_before.get(lesson['id'], [])
+        lesson['links_after'] = links_after.get(lesson['id'], [])
+
+    return lessons
+
+
+async def _get_links_by_lessons(link_model, lesson_ids: list[int], db: AsyncSession) -> dict[int, list]:
+    if not lesson_ids:
+        return {}
+
+    db_links = await db.execute(select(link_model.id, link_model.lesson_id, link_model.linked_lesson_id).
+                                where(link_model.lesson_id.in_(lesson_ids)).
+                                order_by(link_model.id))
+    links = {}
+    for link in db_links.mappings():
+        links.setdefault(link['lesson_id'], []).append(dict(link))
+    return links
 
 
 async def update_lesson(lesson_id: int,
@@ -86,27 +247,37 @@ async def update_lesson(lesson_id: int,
             return 'no_trainer'
 
     if cover:
+        lesson_dict['path_to_cover'] = await upload_file('lessons/cover', cover, cover.filename)
         if db_lesson.path_to_cover:
             delete_file(db_lesson.path_to_cover)
-        lesson_dict['path_to_cover'] = upload_file('lessons/cover', cover, cover.filename)
     if video:
+        lesson_dict['path_to_video'] = await upload_file('lessons/video', video, video.filename)
         if db_lesson.path_to_video:
             delete_file(db_lesson.path_to_video)
-        lesson_dict['path_to_video'] = upload_file('lessons/video', video, video.filename)
+        lesson_dict['video_length'] = await run_in_threadpool(get_file_length, lesson_dict['path_to_video'])
     if audio:
+        lesson_dict['path_to_audio'] = await upload_file('lessons/audio', audio, audio.filename)
         if db_lesson.path_to_audio:
             delete_file(db_lesson.path_to_audio)
-        lesson_dict['path_to_audio'] = upload_file('lessons/audio', audio, audio.filename)
+        lesson_dict['audio_length'] = await run_in_threadpool(get_file_length, lesson_dict['path_to_audio'])
+
+    if lesson_dict.get('course_id', db_lesson.course_id) != db_lesson.course_id:
+        await _add_course_views(db_lesson.course_id, -db_lesson.number_of_views, db)
+        await _add_course_views(lesson_dict['course_id'], db_lesson.number_of_views, db)
 
     for key, value in lesson_dict.items():
         setattr(db_lesson, key, value)
 
+    version = await catalog_cache.bump_version(db)
     await db.commit()
+    await catalog_cache.invalidate(version)
     return db_lesson
 
 
 async def delete_lesson(lesson_id: int, db: AsyncSession):
-    db_lesson = await db.get(models.Lesson, lesson_id)
+    db_lesson = await db.get(models.Lesson, lesson_id, options=[selectinload(models.Lesson.planned_lessons),
+                                                                selectinload(models.Lesson.views),
+                                                                selectinload(models.Lesson.favorites)])
     if not db_lesson:
         return 'no_lesson'
 
@@ -117,8 +288,87 @@ async def delete_lesson(lesson_id: int, db: AsyncSession):
     except FileNotFoundError:
         pass
 
+    await _add_course_views(db_lesson.course_id, -db_lesson.number_of_views, db)
     await db.delete(db_lesson)
+    version = await catalog_cache.bump_version(db)
     await db.commit()
+    await catalog_cache.invalidate(version)
+
+
+async def _add_course_views(course_id: int | None, number_of_views: int, db: AsyncSession):
+    if course_id is None or not number_of_views:
+        return
+    await db.execute(update(course_models.Course).
+                     where(course_models.Course.id == course_id).
+                     values(number_of_views=course_models.Course.number_of_views + number_of_views))
+
+
+async def reconcile_view_counters(db: AsyncSession) -> int:
+    lesson_views = (select(auth_models.View.lesson_id, func.count().label('number_of_views'))
+                    .group_by(auth_models.View.lesson_id)
+                    .subquery())
+    lesson_number_of_views = func.coalesce(
+        select(lesson_views.c.number_of_views).
+        where(lesson_views.c.lesson_id == models.Lesson.id).
+        scalar_subquery(), 0)
+    # Counters to repair are locked in id order, lessons before courses, as view flushes lock them
+    lesson_ids = await db.scalars(
+        select(models.Lesson.id).
+        where(models.Lesson.number_of_views != lesson_number_of_views).
+        order_by(models.Lesson.id).
+        with_for_update(key_share=True)
+    )
+    db_lessons = await db.execute(
+        update(models.Lesson).
+        where(models.Lesson.id.in_(lesson_ids.all()), models.Lesson.number_of_views != lesson_number_of_views).
+        values(number_of_views=lesson_number_of_views)
+    )
+
+    course_views = (select(models.Lesson.course_id, func.sum(models.Lesson.number_of_views).label('number_of_views'))
+                    .group_by(models.Lesson.course_id)
+                    .subquery())
+    course_number_of_views = func.coalesce(
+        select(course_views.c.number_of_views).
+        where(course_views.c.course_id == course_models.Course.id).
+        scalar_subquery(), 0)
+    course_ids = await db.scalars(
+        select(course_models.Course.id).
+        where(course_models.Course.number_of_views != course_number_of_views).
+        order_by(course_models.Course.id).
+        with_for_update(key_share=True)
+    )
+    db_courses = await db.execute(
+        update(course_models.Course).
+        where(course_models.Course.id.in_(course_ids.all()),
+              course_models.Course.number_of_views != course_number_of_views).
+        values(number_of_views=course_number_of_views)
+    )
+
+    repaired = db_lessons.rowcount + db_courses.rowcount
+    version = await catalog_cache.bump_version(db) if repaired else None
+    await db.commit()
+    if version is not None:
+        await catalog_cache.invalidate(version)
+    return repaired
+
+
+async def backfill_media_lengths(db: AsyncSession) -> int:
+    db_lessons = await db.execute(
+        select(models.Lesson).
+        options(Load(models.Lesson).noload('*')).
+        where(or_(and_(models.Lesson.path_to_video.is_not(None), models.Lesson.video_length.is_(None)),
+                  and_(models.Lesson.path_to_audio.is_not(None), models.Lesson.audio_length.is_(None))))
+    )
+    obj_lessons = db_lessons.scalars().all()
+
+    for obj in obj_lessons:
+        obj.video_length = await run_in_threadpool(get_file_length, obj.path_to_video)
+        obj.audio_length = await run_in_threadpool(get_file_length, obj.path_to_audio)
+
+    version = await catalog_cache.bump_version(db)
+    await db.commit()
+    await catalog_cache.invalidate(version)
+    return len(obj_lessons)
 
 
 async def add_link_before_lesson(lesson_id: int,
@@ -135,7 +385,9 @@ async def add_link_before_lesson(lesson_id: int,
     db_link_before_lesson = models.LinkBeforeLesson(lesson_id=lesson_id, linked_lesson_id=link_before_lesson_id)
     db.add(db_link_before_lesson)
 
+    version = await catalog_cache.bump_version(db)
     await db.commit()
+    await catalog_cache.invalidate(version)
     return db_lesson
 
 
@@ -145,18 +397,12 @@ async def remove_link_before_lesson(link_before_lesson_id: int,
     if not db_link_before_lesson:
         return
     await db.delete(db_link_before_lesson)
+    version = await catalog_cache.bump_version(db)
     await db.commit()
+    await catalog_cache.invalidate(version)
     return True
 
 
-async def get_links_before_by_lesson(lesson_id: int, db: AsyncSession):
-    db_link_before_lesson = await db.execute(select(models.LinkBeforeLesson).
-                                             where(models.LinkBeforeLesson.lesson_id == lesson_id))
-    obj_link_before_lesson = db_link_before_lesson.scalars().all()
-    # result = [item.__dict__['linked_lesson_id'] for item in obj_link_before_lesson]
-    return obj_link_before_lesson
-
-
 # ===
 
 async def add_link_after_lesson(lesson_id: int,
@@ -173,7 +419,9 @@ async def add_link_after_lesson(lesson_id: int,
     db_link_after_lesson = models.LinkAfterLesson(lesson_id=lesson_id, linked_lesson_id=link_after_lesson_id)
     db.add(db_link_after_lesson)
 
+    version = await catalog_cache.bump_version(db)
     await db.commit()
+    await catalog_cache.invalidate(version)
     return db_lesson
 
 
@@ -183,36 +431,7 @@ async def remove_link_after_lesson(link_after_lesson_id: int,
     if not db_link_after_lesson:
         return
     await db.delete(db_link_after_lesson)
+    version = await catalog_cache.bump_version(db)
     await db.commit()
+    await catalog_cache.invalidate(version)
     return True
-
-
-async def get_links_after_by_lesson(lesson_id: int, db: AsyncSession):
-    db_link_after_lesson = await db.execute(select(models.LinkAfterLesson).
-                                            where(models.LinkAfterLesson.lesson_id == lesson_id))
-    obj_link_after_lesson = db_link_after_lesson.scalars().all()
-    return obj_link_after_lesson
-
-
-async def get_number_of_views(lesson_id: int, db: AsyncSession) -> int:
-    cnt = await db.execute(select(func.count()).select_from(auth_models.View).
-                           where(auth_models.View.lesson_id == lesson_id))
-    return cnt.scalar()
-
-
-async def is_viewed(lesson_id: int, user_id: int | None, db: AsyncSession) -> bool:
-    if user_id is None:
-        return False
-    cnt = await db.execute(select(func.count()).select_from(auth_models.View).
-                           where(and_(auth_models.View.lesson_id == lesson_id,
-                                      auth_models.View.user_id == user_id)))
-    return cnt.scalar() > 0
-
-
-async def is_favorite(lesson_id: int, user_id: int | None, db: AsyncSession) -> bool:
-    if user_id is None:
-        return False
-    cnt = await db.execute(select(func.count()).select_from(auth_models.Favorite).
-                           where(and_(auth_models.Favorite.lesson_id == lesson_id,
-                                      auth_models.Favorite.user_id == user_id)))
-    return cnt.scalar() > 0
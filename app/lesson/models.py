@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -6,35 +6,41 @@ from app.database import Base
 
 class Lesson(Base):
     __tablename__ = "lesson"
+    __table_args__ = (
+        Index('ix_lesson_number_of_views_id', 'number_of_views', 'id'),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String)
     description = Column(String)
     path_to_cover = Column(String)
     path_to_video = Column(String)
     path_to_audio = Column(String)
+    video_length = Column(String)
+    audio_length = Column(String)
+    number_of_views = Column(Integer, nullable=False, default=0, server_default='0')
 
     trainer_id = Column(Integer, ForeignKey("trainer.id"))
-    trainer = relationship("Trainer", back_populates="lessons", lazy='selectin')
+    trainer = relationship("Trainer", back_populates="lessons", lazy='raise')
 
     course_id = Column(Integer, ForeignKey("course.id"))
-    course = relationship("Course", back_populates="lessons", lazy='selectin')
+    course = relationship("Course", back_populates="lessons", lazy='raise')
 
-    planned_lessons = relationship("PlannedLesson", back_populates="lesson", cascade="all, delete")
-    views = relationship("View", back_populates="lesson", cascade="all, delete")
-    favorites = relationship("Favorite", back_populates="lesson", cascade="all, delete")
+    planned_lessons = relationship("PlannedLesson", back_populates="lesson", cascade="all, delete", lazy='raise')
+    views = relationship("View", back_populates="lesson", cascade="all, delete", lazy='raise')
+    favorites = relationship("Favorite", back_populates="lesson", cascade="all, delete", lazy='raise')
 
 
 class LinkBeforeLesson(Base):
     __tablename__ = "link_before_lesson"
     id = Column(Integer, primary_key=True, autoincrement=True)
 
-    lesson_id = Column(Integer, ForeignKey("lesson.id", ondelete="cascade"))
-    linked_lesson_id = Column(Integer, ForeignKey("lesson.id", ondelete="cascade"))
+    lesson_id = Column(Integer, ForeignKey("lesson.id", ondelete="cascade"), index=True)
+    linked_lesson_id = Column(Integer, ForeignKey("lesson.id", ondelete="cascade"), index=True)
 
 
 class LinkAfterLesson(Base):
     __tablename__ = "link_after_lesson"
     id = Column(Integer, primary_key=True, autoincrement=True)
 
-    lesson_id = Column(Integer, ForeignKey("lesson.id", ondelete="cascade"))
-    linked_lesson_id = Column(Integer, ForeignKey("lesson.id", ondelete="cascade"))
+    lesson_id = Column(Integer, ForeignKey("lesson.id", ondelete="cascade"), index=True)
+    linked_lesson_id = Column(Integer, ForeignKey("lesson.id", ondelete="cascade"), index=True)
@@ -1,8 +1,7 @@
-from pydantic import BaseModel, field_serializer, computed_field
+from pydantic import BaseModel, TypeAdapter, field_serializer
 
 from app.config import HOSTNAME
 from app.trainer import schemas as trainer_schemas
-from app.utils import get_file_length
 
 
 class LessonCreate(BaseModel):
@@ -28,32 +27,37 @@ class LessonRead(BaseModel):
     path_to_cover: str | None
     path_to_video: str | None
     path_to_audio: str | None
+    video_length: str | None
+    audio_length: str | None
     links_before: list[LinkedLessonRead]
     links_after: list[LinkedLessonRead]
     number_of_views: int
     is_viewed: bool
     is_favorite: bool
 
-    @computed_field
-    @property
-    def video_length(self) -> str | None:
-        if self.path_to_video is None:
-            return
-        return get_file_length(self.path_to_video)
+    @field_serializer('path_to_cover', 'path_to_video', 'path_to_audio')
+    def add_hostname(self, path: str | None) -> str | None:
+        if type(path) is str:
+            return HOSTNAME + path
 
-    @computed_field
-    @property
-    def audio_length(self) -> str | None:
-        if self.path_to_audio is None:
-            return
-        return get_file_length(self.path_to_audio)
 
-    @field_serializer('path_to_cover', 'path_to_video', 'path_to_audio')
+class LessonSummary(BaseModel):
+    id: int
+    title: str
+    course_id: int | None
+    path_to_cover: str | None
+    number_of_views: int
+
+    @field_serializer('path_to_cover')
     def add_hostname(self, path: str | None) -> str | None:
         if type(path) is str:
             return HOSTNAME + path
 
 
+LessonListAdapter = TypeAdapter(list[LessonRead])
+LessonSummaryListAdapter = TypeAdapter(list[LessonSummary])
+
+
 class LessonUpdate(BaseModel):
     title: str | None
     description: str | None
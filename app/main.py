@@ -1,12 +1,27 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse, Response
+from fastapi.responses import ORJSONResponse, RedirectResponse, Response
 
 from app.auth.auth import auth_backend, fastapi_users
 from app.auth.schemas import UserRead, UserCreate
-from .routers import user, trainer, lesson, course
+from app.config import COMPRESSION_MIN_SIZE
+from app.database import engine
+from app.middleware import CompressionMiddleware, snapshot_cache
+from app.tasks import start_background_tasks, stop_background_tasks
+from .routers import user, trainer, lesson, course, upload, media, service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = start_background_tasks()
+    yield
+    await stop_background_tasks(tasks)
+    await engine.dispose()
+
 
-app = FastAPI(title='Holiwell API')
+app = FastAPI(title='Holiwell API', lifespan=lifespan, default_response_class=ORJSONResponse)
 
 
 @app.get("/", include_in_schema=False)
@@ -69,6 +84,24 @@ app.include_router(
     tags=["course"],
 )
 
+app.include_router(
+    upload.router,
+    prefix="/api/uploads",
+    tags=["upload"],
+)
+
+app.include_router(
+    service.router,
+    prefix="/api/service",
+    tags=["service"],
+)
+
+app.include_router(
+    media.router,
+    prefix="/files",
+    tags=["media"],
+)
+
 origins = [
     "http://localhost",
     "http://localhost:8000",
@@ -78,6 +111,13 @@ origins = [
     "http://154.194.52.246:3000",
 ]
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MIN_SIZE,
+    snapshot_cache=snapshot_cache,
+    snapshot_paths=("/api/lessons", "/api/courses", "/api/trainers"),
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -86,9 +126,10 @@ app.add_middleware(
     expose_headers=["Content-Type", "Content-Length", "Access-Control-Allow-Headers", "Access-Control-Allow-Origin",
                     "Authorization", "Accept", "Accept-Encoding", "Accept-Language", "Content-Language", "Range",
                     "X-Requested-With", "Cookie", "Set-Cookie", "Connection", "Host", "Origin", "Referer", "User-Agent",
-                    "Access-Control-Expose-Headers"],
+                    "Access-Control-Expose-Headers", "X-Next-Cursor", "Accept-Ranges", "Content-Range", "ETag",
+                    "Last-Modified"],
     allow_headers=["Content-Type", "Content-Length", "Access-Control-Allow-Headers", "Access-Control-Allow-Origin",
                    "Authorization", "Accept", "Accept-Encoding", "Accept-Language", "Content-Language", "Range",
                    "X-Requested-With", "Cookie", "Set-Cookie", "Connection", "Host", "Origin", "Referer", "User-Agent",
-                   "Access-Control-Expose-Headers"],
+                   "Access-Control-Expose-Headers", "If-None-Match", "If-Modified-Since", "If-Range"],
 )
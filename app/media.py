@@ -0,0 +1,189 @@
+import mimetypes
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+
+import anyio
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+MEDIA_ROOT = "files"
+PRIVATE_DIRECTORIES = ("uploads",)
+MAX_RANGES = 16
+CHUNK_SIZE = 256 * 1024
+MULTIPART_BOUNDARY = "holiwell-byteranges"
+
+
+class MediaFileResponse(Response):
+    """
+    File response with byte-range support.
+
+    Ranges are sent through the ASGI zero-copy extension when the server provides it,
+    otherwise the file is read in chunks in a worker thread.
+    """
+
+    def __init__(self, path: str, size: int, ranges: list[tuple[int, int]] | None,
+                 headers: dict[str, str], media_type: str, send_body: bool = True):
+        super().__init__(status_code=206 if ranges else 200, headers=headers)
+        self.path = path
+        self.send_body = send_body
+        self.parts = []
+        self.trailer = b""
+
+        if not ranges:
+            self.parts.append((b"", 0, size))
+            self.headers["content-type"] = media_type
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.parts.append((b"", start, end - start + 1))
+            self.headers["content-type"] = media_type
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+        else:
+            for start, end in ranges:
+                prefix = (f"--{MULTIPART_BOUNDARY}\r\n"
+                          f"Content-Type: {media_type}\r\n"
+                          f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n")
+                self.parts.append(((b"\r\n" if self.parts else b"") + prefix.encode(), start, end - start + 1))
+            self.trailer = f"\r\n--{MULTIPART_BOUNDARY}--\r\n".encode()
+            self.headers["content-type"] = f"multipart/byteranges; boundary={MULTIPART_BOUNDARY}"
+
+        content_length = sum(len(prefix) + count for prefix, _, count in self.parts) + len(self.trailer)
+        self.headers["content-length"] = str(content_length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        zero_copy = "http.response.zerocopysend" in scope.get("extensions", {})
+        async with await anyio.open_file(self.path, "rb") as file:
+            for prefix, offset, count in self.parts:
+                if prefix:
+                    await send({"type": "http.response.body", "body": prefix, "more_body": True})
+                if zero_copy:
+                    await send({"type": "http.response.zerocopysend", "file": file.wrapped,
+                                "offset": offset, "count": count, "more_body": True})
+                    continue
+
+                await file.seek(offset)
+                while count > 0:
+                    chunk = await file.read(min(CHUNK_SIZE, count))
+                    if not chunk:
+                        break
+                    count -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+        await send({"type": "http.response.body", "body": self.trailer, "more_body": False})
+
+
+async def serve_media(path: str, request_headers: Headers, send_body: bool = True) -> Response | None:
+    location = _resolve_path(path)
+    if location is None:
+        return
+
+    try:
+        stat_result = await run_in_threadpool(os.stat, location)
+    except OSError:
+        return
+    if not stat.S_ISREG(stat_result.st_mode):
+        return
+
+    size = stat_result.st_size
+    etag = f'"{stat_result.st_mtime_ns:x}-{size:x}"'
+    headers = {
+        "accept-ranges": "bytes",
+        "etag": etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+    }
+
+    if _is_not_modified(request_headers, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    ranges = None
+    range_header = request_headers.get("range")
+    if range_header and _if_range_matches(request_headers.get("if-range"), etag, stat_result.st_mtime):
+        ranges = _parse_ranges(range_header, size)
+        if ranges == []:
+            headers["content-range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+
+    media_type = mimetypes.guess_type(location)[0] or "application/octet-stream"
+    return MediaFileResponse(location, size, ranges, headers, media_type, send_body)
+
+
+def _resolve_path(path: str) -> str | None:
+    root = os.path.abspath(MEDIA_ROOT)
+    location = os.path.abspath(os.path.join(root, path))
+    if not location.startswith(root + os.sep):
+        return
+
+    parts = os.path.relpath(location, root).split(os.sep)
+    if parts[0] in PRIVATE_DIRECTORIES or any(part.startswith('.') for part in parts):
+        return
+    return location
+
+
+def _is_not_modified(request_headers: Headers, etag: str, mtime: float) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _if_range_matches(if_range: str | None, etag: str, mtime: float) -> bool:
+    if if_range is None:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    try:
+        return int(mtime) <= parsedate_to_datetime(if_range).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def _parse_ranges(range_header: str, size: int) -> list[tuple[int, int]] | None:
+    """
+    Parse a Range header into a sorted list of inclusive (start, end) pairs.
+
+    Returns None when the header should be ignored and the whole file sent,
+    and an empty list when none of the ranges can be satisfied.
+    """
+    unit, _, specs = range_header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return
+
+    ranges = []
+    for spec in specs.split(","):
+        start, sep, end = spec.strip().partition("-")
+        if not sep or not (start or end) or not all(value.isdigit() for value in (start, end) if value):
+            return
+        if start:
+            if end and int(end) < int(start):
+                return
+            start, end = int(start), int(end) if end else size - 1
+            if start < size:
+                ranges.append((start, min(end, size - 1)))
+        elif int(end) > 0 and size > 0:
+            ranges.append((max(size - int(end), 0), size - 1))
+
+    if len(ranges) > MAX_RANGES:
+        return
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
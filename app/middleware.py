@@ -0,0 +1,163 @@
+import gzip
+import hashlib
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import COMPRESSION_CACHE_SIZE
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+class CompressedSnapshotCache:
+    """
+    LRU of compressed response bodies keyed by encoding and body digest.
+
+    Anonymous catalog responses are identical for every client until the catalog changes,
+    so hashing the body is much cheaper than compressing it again.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, bytes], bytes] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple[str, bytes]) -> bytes | None:
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def set(self, key: tuple[str, bytes], body: bytes):
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "size": sum(len(body) for body in self._entries.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class CompressionMiddleware:
+    """
+    Compresses buffered text and JSON responses with brotli (when installed) or gzip.
+
+    Streamed responses, such as media files, are passed through untouched. Bodies of anonymous
+    requests under snapshot_paths are compressed once and then served from snapshot_cache.
+    """
+
+    def __init__(self,
+                 app: ASGIApp,
+                 minimum_size: int,
+                 snapshot_cache: CompressedSnapshotCache,
+                 snapshot_paths: tuple[str, ...] = ()):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.snapshot_cache = snapshot_cache
+        self.snapshot_paths = snapshot_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = _choose_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        use_snapshot = (scope["method"] in ("GET", "HEAD")
+                        and "authorization" not in request_headers
+                        and scope["path"].startswith(self.snapshot_paths))
+        start_message: Message | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] != "http.response.body":
+                # Extensions such as zero-copy send are never compressed, but must follow the start
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            if (message.get("more_body", False)
+                    or "content-encoding" in headers
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                    or len(body) < self.minimum_size):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if use_snapshot:
+                key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+                compressed = self.snapshot_cache.get(key)
+                if compressed is None:
+                    compressed = await run_in_threadpool(_compress, body, encoding)
+                    self.snapshot_cache.set(key, compressed)
+            else:
+                compressed = await run_in_threadpool(_compress, body, encoding)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            # A strong tag promises byte-identical bodies, which no longer holds across encodings
+            if headers.get("etag", "").startswith('"'):
+                headers["ETag"] = "W/" + headers["etag"]
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _choose_encoding(accept_encoding: str) -> str | None:
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+snapshot_cache = CompressedSnapshotCache(COMPRESSION_CACHE_SIZE)
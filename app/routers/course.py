@@ -1,12 +1,14 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Response
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Header, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth import crud as auth_crud
 from app.auth.auth import fastapi_users
 from app.auth.models import User
 from app.database import get_async_session
 from app.course import schemas, crud
+from app.utils import check_etag, serialize_response
 
 router = APIRouter()
 
@@ -25,8 +27,10 @@ async def create_course_type(slug: Annotated[str, Form()],
     return Response(status_code=201)
 
 
-@router.get("/course-type/all", response_model=list[schemas.CourseTypeRead])
+@router.get("/course-type/all", response_model=list[schemas.CourseTypeRead] | list[schemas.CourseTypeSummary])
 async def read_course_types(sort_by: str | None = None,
+                            compact: bool = False,
+                            if_none_match: Annotated[str | None, Header()] = None,
                             user: User = Depends(fastapi_users.current_user(optional=True)),
                             session: AsyncSession = Depends(get_async_session)):
     sort_by = sort_by.strip().lower() if sort_by is not None else None
@@ -35,12 +39,18 @@ async def read_course_types(sort_by: str | None = None,
             "status": "error",
             "msg": f"Unknown type of sorting ('{sort_by}', but requires 'new' or 'popular')"
         })
-    return await crud.get_course_types(user.id if user else None, sort_by, session)
+    etag = await auth_crud.get_catalog_etag(user.id if user else None, session)
+    check_etag(if_none_match, etag)
+    course_types = await crud.get_course_types(user.id if user else None, sort_by, session, compact)
+    if compact:
+        return serialize_response(schemas.CourseTypeSummaryListAdapter, course_types, {"ETag": etag})
+    return serialize_response(schemas.CourseTypeListAdapter, course_types, {"ETag": etag})
 
 
-@router.get("/course-type/{course_type_slug}", response_model=schemas.CourseTypeRead)
+@router.get("/course-type/{course_type_slug}", response_model=schemas.CourseTypeRead | schemas.CourseTypeSummary)
 async def read_course(course_type_slug: str,
                       sort_by: str | None = None,
+                      compact: bool = False,
                       user: User = Depends(fastapi_users.current_user(optional=True)),
                       session: AsyncSession = Depends(get_async_session)):
     sort_by = sort_by.strip().lower() if sort_by is not None else None
@@ -50,13 +60,15 @@ async def read_course(course_type_slug: str,
             "msg": f"Unknown type of sorting ('{sort_by}', but requires 'new' or 'popular')"
         })
 
-    result = await crud.get_course_type(course_type_slug, user.id if user else None, sort_by, session)
+    result = await crud.get_course_type(course_type_slug, user.id if user else None, sort_by, session, compact)
     if not result:
         raise HTTPException(status_code=404, detail={
             "status": "error",
             "msg": f"Course type {course_type_slug} doesn't exist."
         })
-    return result
+    if compact:
+        return serialize_response(schemas.CourseTypeSummaryAdapter, result)
+    return serialize_response(schemas.CourseTypeAdapter, result)
 
 
 @router.post("/create", response_model=schemas.CourseCreate)
@@ -78,8 +90,10 @@ async def create_course(title: Annotated[str, Form()],
     return Response(status_code=201)
 
 
-@router.get("/all", response_model=list[schemas.CourseRead])
+@router.get("/all", response_model=list[schemas.CourseRead] | list[schemas.CourseSummary])
 async def read_courses(sort_by: str | None = None,
+                       compact: bool = False,
+                       if_none_match: Annotated[str | None, Header()] = None,
                        user: User = Depends(fastapi_users.current_user(optional=True)),
                        session: AsyncSession = Depends(get_async_session)):
     sort_by = sort_by.strip().lower() if sort_by is not None else None
@@ -88,7 +102,12 @@ async def read_courses(sort_by: str | None = None,
             "status": "error",
             "msg": f"Unknown type of sorting ('{sort_by}', but requires 'new' or 'popular')"
         })
-    return await crud.get_courses(user.id if user else None, sort_by, session)
+    etag = await auth_crud.get_catalog_etag(user.id if user else None, session)
+    check_etag(if_none_match, etag)
+    courses = await crud.get_courses(user.id if user else None, sort_by, session, compact)
+    if compact:
+        return serialize_response(schemas.CourseSummaryListAdapter, courses, {"ETag": etag})
+    return serialize_response(schemas.CourseListAdapter, courses, {"ETag": etag})
 
 
 @router.get("/{course_id}", response_model=schemas.CourseRead)
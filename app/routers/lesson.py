@@ -1,13 +1,14 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Response
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Header, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth import crud as auth_crud
 from app.auth.auth import fastapi_users
 from app.auth.models import User
 from app.database import get_async_session
 from app.lesson import schemas, crud
-from app.utils import get_file_format
+from app.utils import get_file_format, check_etag, decode_cursor, serialize_response
 
 router = APIRouter()
 
@@ -53,9 +54,13 @@ async def create_lesson(title: Annotated[str, Form()],
     return Response(status_code=201)
 
 
-@router.get("/all", response_model=list[schemas.LessonRead])
+@router.get("/all", response_model=list[schemas.LessonRead] | list[schemas.LessonSummary])
 async def read_lessons(sort_by: str | None = None,
                        course_type_slug: str | None = None,
+                       compact: bool = False,
+                       limit: Annotated[int | None, Query(ge=1, le=1000)] = None,
+                       cursor: str | None = None,
+                       if_none_match: Annotated[str | None, Header()] = None,
                        user: User = Depends(fastapi_users.current_user(optional=True)),
                        session: AsyncSession = Depends(get_async_session)):
     sort_by = sort_by.strip().lower() if sort_by is not None else None
@@ -64,7 +69,24 @@ async def read_lessons(sort_by: str | None = None,
             "status": "error",
             "msg": f"Unknown type of sorting ('{sort_by}', but requires 'new' or 'popular')"
         })
-    return await crud.get_lessons(sort_by, user.id if user else None, course_type_slug, session)
+    after = None
+    if cursor is not None:
+        after = decode_cursor(cursor, 2 if sort_by == "popular" else 1)
+        if after is None:
+            raise HTTPException(status_code=422, detail={
+                "status": "error",
+                "msg": f"Invalid cursor '{cursor}'"
+            })
+    etag = await auth_crud.get_catalog_etag(user.id if user else None, session)
+    check_etag(if_none_match, etag)
+    lessons, next_cursor = await crud.get_lessons(sort_by, user.id if user else None, course_type_slug, session,
+                                                  limit, after, compact)
+    headers = {"ETag": etag}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+    if compact:
+        return serialize_response(schemas.LessonSummaryListAdapter, lessons, headers)
+    return serialize_response(schemas.LessonListAdapter, lessons, headers)
 
 
 @router.get("/{lesson_id}", response_model=schemas.LessonRead)
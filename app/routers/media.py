@@ -0,0 +1,16 @@
+from fastapi import APIRouter, HTTPException, Request
+
+from app.media import serve_media
+
+router = APIRouter()
+
+
+@router.api_route("/{path:path}", methods=["GET", "HEAD"])
+async def read_media(path: str, request: Request):
+    result = await serve_media(path, request.headers, send_body=request.method == "GET")
+    if not result:
+        raise HTTPException(status_code=404, detail={
+            "status": "error",
+            "msg": f"File {path} doesn't exist."
+        })
+    return result
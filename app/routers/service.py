@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+
+from app.auth.auth import fastapi_users
+from app.auth.buffer import view_buffer
+from app.auth.email import mail_outbox
+from app.auth.models import User
+from app.auth.password import password_pool
+from app.auth.strategy import user_cache
+from app.cache import catalog_cache
+from app.database import get_pool_stats
+from app.middleware import snapshot_cache
+
+router = APIRouter()
+
+
+@router.get("/stats")
+async def read_stats(user: User = Depends(fastapi_users.current_user(superuser=True))):
+    return {
+        "database_pool": get_pool_stats(),
+        "view_buffer": view_buffer.get_stats(),
+        "mail_outbox": mail_outbox.get_stats(),
+        "user_cache": user_cache.get_stats(),
+        "password_hashing": password_pool.get_stats(),
+        "catalog_cache": catalog_cache.get_stats(),
+        "compressed_snapshots": snapshot_cache.get_stats(),
+    }
@@ -1,12 +1,14 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Response
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Header, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.auth import fastapi_users
 from app.auth.models import User
+from app.cache import catalog_cache
 from app.database import get_async_session
 from app.trainer import schemas, crud
+from app.utils import check_etag, serialize_response
 
 router = APIRouter()
 
@@ -26,8 +28,13 @@ async def create_trainer(first_name: Annotated[str, Form()],
 
 
 @router.get("/all", response_model=list[schemas.TrainerRead])
-async def read_trainers(session: AsyncSession = Depends(get_async_session)):
-    return await crud.get_trainers(session)
+async def read_trainers(if_none_match: Annotated[str | None, Header()] = None,
+                        session: AsyncSession = Depends(get_async_session)):
+    # Trainers carry no per-user fields, so every client shares the anonymous tag
+    etag = await catalog_cache.get_etag(session)
+    check_etag(if_none_match, etag)
+    trainers = await crud.get_trainers(session)
+    return serialize_response(schemas.TrainerListAdapter, trainers, {"ETag": etag})
 
 
 @router.get("/{trainer_id}", response_model=schemas.TrainerRead)
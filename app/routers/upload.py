@@ -0,0 +1,128 @@
+import os
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Form, HTTPException, Path, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.auth import fastapi_users
+from app.auth.models import User
+from app.config import MAX_UPLOAD_SIZE, MAX_UPLOAD_CHUNK_SIZE
+from app.database import get_async_session
+from app.upload import schemas, crud
+
+router = APIRouter()
+
+MEDIA_FORMATS = {
+    'video': 'mp4',
+    'audio': 'mp3',
+}
+
+
+@router.post("/create", response_model=schemas.UploadSessionRead, status_code=201)
+async def create_upload_session(lesson_id: Annotated[int, Form()],
+                                field: Annotated[str, Form()],
+                                filename: Annotated[str, Form()],
+                                size: Annotated[int, Form(gt=0)],
+                                checksum: Annotated[str, Form()],
+                                user: User = Depends(fastapi_users.current_user(superuser=True)),
+                                session: AsyncSession = Depends(get_async_session)):
+    if field not in MEDIA_FORMATS:
+        raise HTTPException(status_code=422, detail={
+            "status": "error",
+            "msg": f"Unknown media field ('{field}', but requires 'video' or 'audio')"
+        })
+    filename = os.path.basename(filename)
+    if filename.split('.')[-1] != MEDIA_FORMATS[field]:
+        raise HTTPException(status_code=418, detail={
+            "status": "error",
+            "msg": f"{field.capitalize()} must be in {MEDIA_FORMATS[field]} format"
+        })
+    if size > MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail={
+            "status": "error",
+            "msg": f"File {filename} exceeds the maximum size of {MAX_UPLOAD_SIZE} bytes"
+        })
+
+    upload_session = schemas.UploadSessionCreate(lesson_id=lesson_id,
+                                                 field=field,
+                                                 filename=filename,
+                                                 size=size,
+                                                 checksum=checksum)
+    result = await crud.create_upload_session(upload_session, session)
+    if result == 'no_lesson':
+        raise HTTPException(status_code=404, detail={
+            "status": "error",
+            "msg": f"Lesson {lesson_id} doesn't exist."
+        })
+    return result
+
+
+@router.get("/{upload_session_id}", response_model=schemas.UploadSessionRead)
+async def read_upload_session(upload_session_id: int,
+                              user: User = Depends(fastapi_users.current_user(superuser=True)),
+                              session: AsyncSession = Depends(get_async_session)):
+    result = await crud.get_upload_session(upload_session_id, session)
+    if not result:
+        raise HTTPException(status_code=404, detail={
+            "status": "error",
+            "msg": f"Upload session {upload_session_id} doesn't exist."
+        })
+    return result
+
+
+@router.put("/{upload_session_id}/chunks/{number}")
+async def upload_chunk(upload_session_id: int,
+                       number: Annotated[int, Path(ge=0)],
+                       request: Request,
+                       user: User = Depends(fastapi_users.current_user(superuser=True)),
+                       session: AsyncSession = Depends(get_async_session)):
+    content_length = request.headers.get('content-length')
+    if content_length is not None and content_length.isdigit() and int(content_length) > MAX_UPLOAD_CHUNK_SIZE:
+        raise HTTPException(status_code=413, detail={
+            "status": "error",
+            "msg": f"Chunk {number} exceeds the maximum size of {MAX_UPLOAD_CHUNK_SIZE} bytes"
+        })
+
+    result = await crud.upload_chunk(upload_session_id, number, request.stream(), session)
+    if result == 'no_upload_session':
+        raise HTTPException(status_code=404, detail={
+            "status": "error",
+            "msg": f"Upload session {upload_session_id} doesn't exist."
+        })
+    return Response(status_code=204)
+
+
+@router.post("/{upload_session_id}/finalize")
+async def finalize_upload_session(upload_session_id: int,
+                                  user: User = Depends(fastapi_users.current_user(superuser=True)),
+                                  session: AsyncSession = Depends(get_async_session)):
+    result = await crud.finalize_upload_session(upload_session_id, session)
+    if result == 'no_upload_session':
+        raise HTTPException(status_code=404, detail={
+            "status": "error",
+            "msg": f"Upload session {upload_session_id} doesn't exist."
+        })
+    elif result == 'incomplete':
+        raise HTTPException(status_code=409, detail={
+            "status": "error",
+            "msg": f"Upload session {upload_session_id} is missing chunks."
+        })
+    elif result == 'checksum_mismatch':
+        raise HTTPException(status_code=422, detail={
+            "status": "error",
+            "msg": f"Checksum of upload session {upload_session_id} doesn't match."
+        })
+    return Response(status_code=204)
+
+
+@router.delete("/{upload_session_id}")
+async def delete_upload_session(upload_session_id: int,
+                                user: User = Depends(fastapi_users.current_user(superuser=True)),
+                                session: AsyncSession = Depends(get_async_session)):
+    result = await crud.delete_upload_session(upload_session_id, session)
+    if not result:
+        raise HTTPException(status_code=404, detail={
+            "status": "error",
+            "msg": f"Upload session {upload_session_id} doesn't exist."
+        })
+    return Response(status_code=204)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, UploadFile, Response, HTTPException, Form
+from fastapi import APIRouter, Depends, UploadFile, Response, HTTPException, Form, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import crud, schemas
@@ -9,6 +9,7 @@ from app.auth.auth import fastapi_users
 from app.auth import schemas, models
 from app.lesson import schemas as lesson_schemas
 from app.database import get_async_session
+from app.utils import decode_cursor, serialize_response
 
 router = APIRouter()
 
@@ -64,10 +65,22 @@ async def delete_link_after_lesson(plan_lesson_id: int,
     return Response(status_code=204)
 
 
-@router.get("/my-calendar", response_model=list[schemas.PlannedLessonRead])
-async def get_planned_lessons(user: models.User = Depends(fastapi_users.current_user()),
+@router.get("/my-calendar",
+            response_model=list[schemas.PlannedLessonRead] | list[schemas.PlannedLessonCompactRead])
+async def get_planned_lessons(since: Annotated[datetime | None, Query(alias="from")] = None,
+                              until: Annotated[datetime | None, Query(alias="to")] = None,
+                              compact: bool = False,
+                              limit: Annotated[int | None, Query(ge=1, le=1000)] = None,
+                              cursor: str | None = None,
+                              user: models.User = Depends(fastapi_users.current_user()),
                               session: AsyncSession = Depends(get_async_session)):
-    return await crud.get_planned_lessons_by_user(user.id, session)
+    planned_lessons, next_cursor = await crud.get_planned_lessons_by_user(user.id, session, limit,
+                                                                          _decode_cursor(cursor, 2),
+                                                                          since, until, compact)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else None
+    if compact:
+        return serialize_response(schemas.PlannedLessonCompactListAdapter, planned_lessons, headers)
+    return serialize_response(schemas.PlannedLessonListAdapter, planned_lessons, headers)
 
 
 @router.post("/like-lesson", response_model=schemas.FavoriteCreate)
@@ -102,9 +115,13 @@ async def delete_favorite(lesson_id: Annotated[int, Form()],
 
 
 @router.get("/my-favorite", response_model=list[lesson_schemas.LessonRead])
-async def get_favorite(user: models.User = Depends(fastapi_users.current_user()),
+async def get_favorite(limit: Annotated[int | None, Query(ge=1, le=1000)] = None,
+                       cursor: str | None = None,
+                       user: models.User = Depends(fastapi_users.current_user()),
                        session: AsyncSession = Depends(get_async_session)):
-    return await crud.get_favorites_by_user(user.id, session)
+    lessons, next_cursor = await crud.get_favorites_by_user(user.id, session, limit, _decode_cursor(cursor))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else None
+    return serialize_response(lesson_schemas.LessonListAdapter, lessons, headers)
 
 
 @router.post("/watch-lesson", response_model=schemas.ViewCreate)
@@ -126,9 +143,25 @@ async def create_view(lesson_id: Annotated[int, Form()],
 
 
 @router.get("/my-viewed", response_model=list[lesson_schemas.LessonRead])
-async def get_views(user: models.User = Depends(fastapi_users.current_user()),
+async def get_views(limit: Annotated[int | None, Query(ge=1, le=1000)] = None,
+                    cursor: str | None = None,
+                    user: models.User = Depends(fastapi_users.current_user()),
                     session: AsyncSession = Depends(get_async_session)):
-    return await crud.get_views_by_user(user.id, session)
+    lessons, next_cursor = await crud.get_views_by_user(user.id, session, limit, _decode_cursor(cursor))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else None
+    return serialize_response(lesson_schemas.LessonListAdapter, lessons, headers)
+
+
+def _decode_cursor(cursor: str | None, size: int = 1) -> list[int] | None:
+    if cursor is None:
+        return None
+    after = decode_cursor(cursor, size)
+    if after is None:
+        raise HTTPException(status_code=422, detail={
+            "status": "error",
+            "msg": f"Invalid cursor '{cursor}'"
+        })
+    return after
 
 
 router.include_router(
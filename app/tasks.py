@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from app.auth.buffer import view_buffer
+from app.auth.email import mail_outbox
+from app.cache import catalog_cache
+from app.config import UPLOAD_SESSION_GC_INTERVAL, VIEW_COUNTER_RECONCILE_INTERVAL
+from app.database import async_session_maker
+from app.lesson.crud import reconcile_view_counters
+from app.upload.crud import delete_expired_upload_sessions
+
+logger = logging.getLogger(__name__)
+
+
+async def collect_upload_sessions() -> int:
+    async with async_session_maker() as session:
+        return await delete_expired_upload_sessions(session)
+
+
+async def repair_view_counters() -> int:
+    async with async_session_maker() as session:
+        return await reconcile_view_counters(session)
+
+
+async def run_periodically(job: Callable[[], Awaitable], interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await job()
+        except Exception:
+            logger.exception("Background job %s failed", job.__name__)
+
+
+def start_background_tasks() -> list[asyncio.Task]:
+    return [
+        asyncio.create_task(run_periodically(collect_upload_sessions, UPLOAD_SESSION_GC_INTERVAL)),
+        asyncio.create_task(run_periodically(repair_view_counters, VIEW_COUNTER_RECONCILE_INTERVAL)),
+        asyncio.create_task(view_buffer.run()),
+        asyncio.create_task(catalog_cache.run()),
+        asyncio.create_task(mail_outbox.run()),
+    ]
+
+
+async def stop_background_tasks(tasks: list[asyncio.Task]):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Views and mail accepted before shutdown must not be lost, and one failing flush must not skip the other
+    for flush in (view_buffer.flush, mail_outbox.flush):
+        try:
+            await flush()
+        except Exception:
+            logger.exception("Final flush %s failed", flush.__qualname__)
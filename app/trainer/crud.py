@@ -1,34 +1,46 @@
 from fastapi import UploadFile
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from app.cache import catalog_cache
 from app.trainer import models, schemas
 from app.utils import upload_file, delete_file
 
 
 async def create_trainer(trainer: schemas.TrainerCreate, avatar: UploadFile, background: UploadFile, db: AsyncSession):
     trainer_dict = trainer.model_dump()
-    trainer_dict['path_to_avatar'] = upload_file('trainers/avatar', avatar, avatar.filename)
-    trainer_dict['path_to_background'] = upload_file('trainers/background', background, background.filename)
+    trainer_dict['path_to_avatar'] = await upload_file('trainers/avatar', avatar, avatar.filename)
+    trainer_dict['path_to_background'] = await upload_file('trainers/background', background, background.filename)
 
     db_trainer = models.Trainer(**trainer_dict)
     db.add(db_trainer)
 
+    version = await catalog_cache.bump_version(db)
     await db.commit()
+    await catalog_cache.invalidate(version)
     return db_trainer
 
 
 async def get_trainer(trainer_id: int, db: AsyncSession):
-    db_trainer = await db.get(models.Trainer, trainer_id)
-    if not db_trainer:
+    return await catalog_cache.get_or_build(('trainer', trainer_id), lambda: _get_trainer(trainer_id, db))
+
+
+async def _get_trainer(trainer_id: int, db: AsyncSession):
+    db_trainer = await db.execute(select(*models.Trainer.__table__.c).where(models.Trainer.id == trainer_id))
+    trainer = db_trainer.mappings().first()
+    if not trainer:
         return
-    return db_trainer
+    return dict(trainer)
 
 
 async def get_trainers(db: AsyncSession):
-    db_trainers = await db.execute(select(models.Trainer).limit(1000))
-    obj_trainers = db_trainers.scalars().all()
-    return obj_trainers
+    return await catalog_cache.get_or_build(('trainers',), lambda: _get_trainers(db))
+
+
+async def _get_trainers(db: AsyncSession):
+    db_trainers = await db.execute(select(*models.Trainer.__table__.c).limit(1000))
+    return [dict(row) for row in db_trainers.mappings()]
 
 
 async def update_trainer(trainer_id: int, trainer: schemas.TrainerUpdate,
@@ -40,21 +52,23 @@ async def update_trainer(trainer_id: int, trainer: schemas.TrainerUpdate,
     trainer_dict = trainer.model_dump(exclude_none=True)
 
     if avatar:
+        trainer_dict['path_to_avatar'] = await upload_file('trainers/avatar', avatar, avatar.filename)
         delete_file(db_trainer.path_to_avatar)
-        trainer_dict['path_to_avatar'] = upload_file('trainers/avatar', avatar, avatar.filename)
     if background:
+        trainer_dict['path_to_background'] = await upload_file('trainers/background', background, background.filename)
         delete_file(db_trainer.path_to_background)
-        trainer_dict['path_to_background'] = upload_file('trainers/background', background, background.filename)
 
     for key, value in trainer_dict.items():
         setattr(db_trainer, key, value)
 
+    version = await catalog_cache.bump_version(db)
     await db.commit()
+    await catalog_cache.invalidate(version)
     return db_trainer
 
 
 async def delete_trainer(trainer_id: int, db: AsyncSession):
-    db_trainer = await db.get(models.Trainer, trainer_id)
+    db_trainer = await db.get(models.Trainer, trainer_id, options=[selectinload(models.Trainer.lessons)])
     if not db_trainer:
         return
 
@@ -65,5 +79,7 @@ async def delete_trainer(trainer_id: int, db: AsyncSession):
         pass
 
     await db.delete(db_trainer)
+    version = await catalog_cache.bump_version(db)
     await db.commit()
+    await catalog_cache.invalidate(version)
     return True
@@ -13,4 +13,4 @@ class Trainer(Base):
     path_to_avatar = Column(String)
     path_to_background = Column(String)
 
-    lessons = relationship("Lesson", back_populates="trainer", lazy='selectin')
+    lessons = relationship("Lesson", back_populates="trainer", lazy='raise')
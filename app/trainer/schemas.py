@@ -1,4 +1,4 @@
-from pydantic import BaseModel, field_serializer
+from pydantic import BaseModel, TypeAdapter, field_serializer
 
 from app.config import HOSTNAME
 
@@ -22,6 +22,9 @@ class TrainerRead(BaseModel):
         return HOSTNAME + path
 
 
+TrainerListAdapter = TypeAdapter(list[TrainerRead])
+
+
 class TrainerUpdate(BaseModel):
     first_name: str | None
     last_name: str | None
@@ -0,0 +1,167 @@
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import catalog_cache
+from app.config import MAX_UPLOAD_CHUNK_SIZE, UPLOAD_SESSION_TTL
+from app.lesson import models as lesson_models
+from app.upload import models, schemas
+from app.utils import save_stream, assemble_file, delete_file, get_file_length
+
+UPLOADS_PATH = "files/uploads"
+
+
+async def create_upload_session(upload_session: schemas.UploadSessionCreate, db: AsyncSession):
+    db_lesson = await db.execute(select(lesson_models.Lesson.id).
+                                 where(lesson_models.Lesson.id == upload_session.lesson_id))
+    if db_lesson.scalar() is None:
+        return 'no_lesson'
+
+    upload_session_dict = upload_session.model_dump()
+    upload_session_dict['expires_at'] = _get_expiration_time()
+
+    db_upload_session = models.UploadSession(**upload_session_dict)
+    db.add(db_upload_session)
+
+    await db.commit()
+    await run_in_threadpool(os.makedirs, _get_chunks_directory(db_upload_session.id), exist_ok=True)
+
+    db_upload_session.received_chunks = []
+    db_upload_session.received_size = 0
+    return db_upload_session
+
+
+async def get_upload_session(upload_session_id: int, db: AsyncSession):
+    db_upload_session = await _get_active_upload_session(upload_session_id, db)
+    if not db_upload_session:
+        return
+
+    chunks = await run_in_threadpool(_list_chunks, upload_session_id)
+    db_upload_session.received_chunks = sorted(chunks)
+    db_upload_session.received_size = sum(chunks.values())
+    return db_upload_session
+
+
+async def upload_chunk(upload_session_id: int, number: int, chunk: AsyncIterator[bytes], db: AsyncSession):
+    db_upload_session = await _get_active_upload_session(upload_session_id, db)
+    if not db_upload_session:
+        return 'no_upload_session'
+    # Return the connection to the pool while the client streams the chunk
+    await db.commit()
+
+    directory = _get_chunks_directory(upload_session_id)
+    await run_in_threadpool(os.makedirs, directory, exist_ok=True)
+    await save_stream(chunk, f"{directory}/{number}", min(MAX_UPLOAD_CHUNK_SIZE, db_upload_session.size))
+
+    await db.execute(update(models.UploadSession).
+                     where(models.UploadSession.id == upload_session_id).
+                     values(expires_at=_get_expiration_time()))
+    await db.commit()
+    return True
+
+
+async def finalize_upload_session(upload_session_id: int, db: AsyncSession):
+    db_upload_session = await _get_active_upload_session(upload_session_id, db)
+    if not db_upload_session:
+        return 'no_upload_session'
+    # Return the connection to the pool while the file is assembled
+    await db.commit()
+
+    chunks = await run_in_threadpool(_list_chunks, upload_session_id)
+    if sorted(chunks) != list(range(len(chunks))) or sum(chunks.values()) != db_upload_session.size:
+        return 'incomplete'
+
+    directory = _get_chunks_directory(upload_session_id)
+    parts = [f"{directory}/{number}" for number in range(len(chunks))]
+    location = await run_in_threadpool(assemble_file, f"lessons/{db_upload_session.field}",
+                                       db_upload_session.filename, parts, db_upload_session.checksum)
+    if location is None:
+        return 'checksum_mismatch'
+
+    length = await run_in_threadpool(get_file_length, location)
+
+    # Another finalize of the same session may have won while this one was assembling
+    db_upload_session = await db.get(models.UploadSession, upload_session_id, with_for_update=True,
+                                     populate_existing=True)
+    if not db_upload_session:
+        await db.rollback()
+        await run_in_threadpool(shutil.rmtree, os.path.dirname(location), ignore_errors=True)
+        return 'no_upload_session'
+
+    db_lesson = await db.get(lesson_models.Lesson, db_upload_session.lesson_id)
+    path_field = f"path_to_{db_upload_session.field}"
+    old_location = getattr(db_lesson, path_field)
+    setattr(db_lesson, path_field, location)
+    setattr(db_lesson, f"{db_upload_session.field}_length", length)
+
+    await db.delete(db_upload_session)
+    version = await catalog_cache.bump_version(db)
+    await db.commit()
+    await catalog_cache.invalidate(version)
+
+    try:
+        delete_file(old_location)
+    except FileNotFoundError:
+        pass
+    await run_in_threadpool(shutil.rmtree, directory, ignore_errors=True)
+    return db_lesson
+
+
+async def delete_upload_session(upload_session_id: int, db: AsyncSession):
+    db_upload_session = await db.get(models.UploadSession, upload_session_id)
+    if not db_upload_session:
+        return
+
+    await db.delete(db_upload_session)
+    await db.commit()
+    await run_in_threadpool(shutil.rmtree, _get_chunks_directory(upload_session_id), ignore_errors=True)
+    return True
+
+
+async def delete_expired_upload_sessions(db: AsyncSession) -> int:
+    await db.execute(delete(models.UploadSession).
+                     where(models.UploadSession.expires_at < datetime.now(timezone.utc)))
+    await db.commit()
+
+    db_upload_sessions = await db.execute(select(models.UploadSession.id))
+    active_ids = {str(upload_session_id) for upload_session_id in db_upload_sessions.scalars().all()}
+    return await run_in_threadpool(_delete_stale_chunks, active_ids)
+
+
+async def _get_active_upload_session(upload_session_id: int, db: AsyncSession):
+    db_upload_session = await db.get(models.UploadSession, upload_session_id)
+    if not db_upload_session or db_upload_session.expires_at < datetime.now(timezone.utc):
+        return
+    return db_upload_session
+
+
+def _get_expiration_time() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=UPLOAD_SESSION_TTL)
+
+
+def _get_chunks_directory(upload_session_id: int) -> str:
+    return f"{UPLOADS_PATH}/{upload_session_id}"
+
+
+def _list_chunks(upload_session_id: int) -> dict[int, int]:
+    directory = _get_chunks_directory(upload_session_id)
+    if not os.path.isdir(directory):
+        return {}
+    return {int(name): os.path.getsize(f"{directory}/{name}") for name in os.listdir(directory) if name.isdigit()}
+
+
+def _delete_stale_chunks(active_ids: set[str]) -> int:
+    if not os.path.isdir(UPLOADS_PATH):
+        return 0
+
+    deleted = 0
+    for name in os.listdir(UPLOADS_PATH):
+        if name not in active_ids:
+            shutil.rmtree(f"{UPLOADS_PATH}/{name}", ignore_errors=True)
+            deleted += 1
+    return deleted
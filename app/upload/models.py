@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime
+
+from app.database import Base
+
+
+class UploadSession(Base):
+    __tablename__ = "upload_session"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    field = Column(String, nullable=False)
+    filename = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    checksum = Column(String, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    lesson_id = Column(Integer, ForeignKey("lesson.id", ondelete="cascade"), nullable=False)
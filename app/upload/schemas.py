@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class UploadSessionCreate(BaseModel):
+    lesson_id: int
+    field: str
+    filename: str
+    size: int
+    checksum: str
+
+
+class UploadSessionRead(BaseModel):
+    id: int
+    lesson_id: int
+    field: str
+    filename: str
+    size: int
+    checksum: str
+    expires_at: datetime
+    received_chunks: list[int]
+    received_size: int
@@ -1,15 +1,25 @@
+import base64
+import binascii
+import hashlib
+import json
 import shutil
 import os
 import shortuuid
+from typing import AsyncIterator
 
 from pymediainfo import MediaInfo
-from fastapi import Depends, UploadFile
+from fastapi import Depends, HTTPException, UploadFile, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.models import User
+from app.config import MAX_UPLOAD_SIZE
 from app.database import get_async_session
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 
 # SERVER_IP = f"http://{requests.get('https://httpbin.org/ip').json()['origin']}"
 
@@ -22,25 +32,85 @@ def get_unique_short_uuid4() -> str:
     return shortuuid.uuid()
 
 
-def upload_file(path: str, file: UploadFile, filename: str) -> str | None:
+async def upload_file(path: str, file: UploadFile, filename: str, max_size: int = MAX_UPLOAD_SIZE) -> str | None:
     if not file or not filename:
         return None
 
-    path_model, path_field = path.split('/')
-    if path_model not in os.listdir("files"):
-        os.mkdir(f"files/{path_model}")
-        os.mkdir(f"files/{path_model}/{path_field}")
+    if file.size is not None and file.size > max_size:
+        raise _file_too_large(filename, max_size)
 
     unique_name = str(get_unique_short_uuid4())
-    os.mkdir(f"files/{path}/{unique_name}")
-    location = f"files/{path}/{unique_name}/{filename}"
+    directory = f"files/{path}/{unique_name}"
+    location = f"{directory}/{filename}"
+    await run_in_threadpool(os.makedirs, directory, exist_ok=True)
+
+    try:
+        await save_stream(_read_upload(file), location, max_size)
+    except BaseException:
+        await run_in_threadpool(shutil.rmtree, directory, ignore_errors=True)
+        raise
+
+    return location
+
+
+async def _read_upload(file: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        yield chunk
+
 
-    with open(location, "wb+") as file_object:
-        shutil.copyfileobj(file.file, file_object)
+async def save_stream(chunks: AsyncIterator[bytes], location: str, max_size: int) -> int:
+    directory, filename = os.path.split(location)
+    # Concurrent writes of the same file, such as a retried chunk, must not share a temp file
+    temp_location = os.path.join(directory, f".{filename}.{get_unique_short_uuid4()}.part")
+
+    size = 0
+    file_object = await run_in_threadpool(open, temp_location, "wb")
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_size:
+                raise _file_too_large(filename, max_size)
+            await run_in_threadpool(file_object.write, chunk)
+    except BaseException:
+        await run_in_threadpool(file_object.close)
+        await run_in_threadpool(os.remove, temp_location)
+        raise
+    await run_in_threadpool(file_object.close)
+
+    await run_in_threadpool(os.replace, temp_location, location)
+    return size
+
+
+def assemble_file(path: str, filename: str, parts: list[str], checksum: str) -> str | None:
+    unique_name = str(get_unique_short_uuid4())
+    directory = f"files/{path}/{unique_name}"
+    location = f"{directory}/{filename}"
+    temp_location = f"{directory}/.{filename}.part"
+    os.makedirs(directory, exist_ok=True)
+
+    digest = hashlib.sha256()
+    with open(temp_location, "wb") as file_object:
+        for part in parts:
+            with open(part, "rb") as part_object:
+                while chunk := part_object.read(UPLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+                    file_object.write(chunk)
+
+    if digest.hexdigest() != checksum.lower():
+        shutil.rmtree(directory, ignore_errors=True)
+        return None
 
+    os.replace(temp_location, location)
     return location
 
 
+def _file_too_large(filename: str, max_size: int) -> HTTPException:
+    return HTTPException(status_code=413, detail={
+        "status": "error",
+        "msg": f"File {filename} exceeds the maximum size of {max_size} bytes"
+    })
+
+
 def delete_file(path: str):
     if path:
         directory = '/'.join(path.split('/')[:-1])
@@ -56,6 +126,8 @@ def get_file_length(path: str) -> str | None:
         except OSError:
             return
         milliseconds = media_info.tracks[0].duration
+        if milliseconds is None:
+            return
 
         (hours, milliseconds) = divmod(milliseconds, 3600 * 1000)
         (minutes, milliseconds) = divmod(milliseconds, 60 * 1000)
@@ -67,3 +139,32 @@ def get_file_length(path: str) -> str | None:
 
 def get_file_format(file: UploadFile) -> str:
     return file.filename.split('.')[-1]
+
+
+def serialize_response(adapter: TypeAdapter, content, headers: dict[str, str] | None = None) -> Response:
+    # Validation and JSON encoding both happen in pydantic-core, bypassing jsonable_encoder
+    return Response(adapter.dump_json(adapter.validate_python(content)), media_type="application/json",
+                    headers=headers)
+
+
+def check_etag(if_none_match: str | None, etag: str):
+    # If-None-Match is compared weakly, so tags weakened by compression still match
+    if if_none_match is None:
+        return
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in tags or "*" in tags:
+        raise HTTPException(status_code=304, headers={"ETag": etag})
+
+
+def encode_cursor(values: list[int]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> list[int] | None:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, binascii.Error):
+        return None
+    if not isinstance(values, list) or len(values) != size or not all(type(value) is int for value in values):
+        return None
+    return values
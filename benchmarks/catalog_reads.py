@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from benchmarks.database import create_schema, throwaway_database
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm.attributes import set_committed_value  # noqa: E402
+
+from app.auth.models import User, View, Favorite  # noqa: E402
+from app.course import crud as course_crud  # noqa: E402
+from app.course.models import Course, CourseType  # noqa: E402
+from app.course.schemas import CourseListAdapter  # noqa: E402
+from app.database import async_session_maker, engine  # noqa: E402
+from app.lesson import crud as lesson_crud  # noqa: E402
+from app.lesson.models import Lesson, LinkBeforeLesson, LinkAfterLesson  # noqa: E402
+from app.lesson.schemas import LessonListAdapter  # noqa: E402
+from app.trainer.models import Trainer  # noqa: E402
+
+COURSES = 3
+
+
+async def run(args: argparse.Namespace):
+    await create_schema()
+    user_id = await _seed(args.lessons)
+
+    reads = [
+        ("lessons, ORM entities", lambda db: _get_lesson_entities(user_id, db), LessonListAdapter, True),
+        ("lessons, rows", lambda db: _get_lessons(user_id, db), LessonListAdapter, False),
+        ("courses, rows", lambda db: course_crud.get_courses(user_id, "popular", db), CourseListAdapter, False),
+    ]
+    for name, load, adapter, from_attributes in reads:
+        best_load = best_serialize = float("inf")
+        for _ in range(args.repeat):
+            async with async_session_maker() as session:
+                started = time.perf_counter()
+                content = await load(session)
+                loaded = time.perf_counter()
+                body = adapter.dump_json(adapter.validate_python(content, from_attributes=from_attributes))
+                best_load = min(best_load, loaded - started)
+                best_serialize = min(best_serialize, time.perf_counter() - loaded)
+
+        # Peak memory is taken in a run of its own, tracemalloc slows down everything it traces
+        tracemalloc.start()
+        async with async_session_maker() as session:
+            adapter.dump_json(adapter.validate_python(await load(session), from_attributes=from_attributes))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(f"{name}: load {best_load * 1000:.0f} ms, validate and serialize {best_serialize * 1000:.0f} ms, "
+              f"peak {peak / 1024 ** 2:.1f} MiB, {len(body)} bytes")
+    await engine.dispose()
+
+
+async def _seed(number_of_lessons: int) -> int:
+    async with async_session_maker() as session:
+        user = User(email="user@example.com", hashed_password="x", first_name="f", last_name="l")
+        trainer = Trainer(first_name="f", last_name="l", description="d", path_to_avatar="files/trainers/avatar/a.png",
+                          path_to_background="files/trainers/background/b.png")
+        course_type = CourseType(slug="yoga")
+        courses = [Course(title=f"c{i}", description="d", path_to_cover=f"files/courses/cover/{i}.png",
+                          course_type=course_type) for i in range(COURSES)]
+        session.add_all([user, trainer, *courses])
+        await session.flush()
+
+        lesson_ids = (await session.scalars(insert(Lesson).returning(Lesson.id), [
+            {"title": f"l{i}", "description": f"description {i}", "trainer_id": trainer.id,
+             "course_id": courses[i % COURSES].id, "path_to_cover": f"files/lessons/cover/{i}.png",
+             "number_of_views": i % 50}
+            for i in range(number_of_lessons)
+        ])).all()
+        await session.execute(insert(LinkBeforeLesson), [{"lesson_id": lesson_id, "linked_lesson_id": lesson_ids[0]}
+                                                        for lesson_id in lesson_ids[1::5]])
+        await session.execute(insert(View), [{"user_id": user.id, "lesson_id": lesson_id}
+                                             for lesson_id in lesson_ids[::3]])
+        await session.execute(insert(Favorite), [{"user_id": user.id, "lesson_id": lesson_id}
+                                                 for lesson_id in lesson_ids[::7]])
+        await session.commit()
+        return user.id
+
+
+async def _get_lessons(user_id: int, db: AsyncSession) -> list[dict]:
+    lessons, _ = await lesson_crud.get_lessons("popular", user_id, None, db)
+    return lessons
+
+
+async def _get_lesson_entities(user_id: int, db: AsyncSession) -> list[Lesson]:
+    # The lesson list as it was built from ORM entities with ad-hoc attributes, before reads moved to rows
+    viewed = Lesson.id.in_(select(View.lesson_id).where(View.user_id == user_id))
+    favorite = Lesson.id.in_(select(Favorite.lesson_id).where(Favorite.user_id == user_id))
+    db_lessons = await db.execute(
+        select(Lesson, Trainer, CourseType.slug, viewed, favorite)
+        .outerjoin(Trainer, Trainer.id == Lesson.trainer_id)
+        .outerjoin(Course, Course.id == Lesson.course_id)
+        .outerjoin(CourseType, CourseType.id == Course.course_type_id)
+        .order_by(Lesson.number_of_views.desc(), Lesson.id.desc())
+    )
+
+    lessons = []
+    for lesson, trainer, course_type_slug, is_viewed, is_favorite in db_lessons.all():
+        set_committed_value(lesson, 'trainer', trainer)
+        lesson.course_type_slug = course_type_slug
+        lesson.is_viewed = is_viewed
+        lesson.is_favorite = is_favorite
+        lessons.append(lesson)
+
+    lesson_ids = [lesson.id for lesson in lessons]
+    for attribute, link_model in (('links_before', LinkBeforeLesson), ('links_after', LinkAfterLesson)):
+        links = {}
+        for link in await db.scalars(select(link_model).where(link_model.lesson_id.in_(lesson_ids))):
+            links.setdefault(link.lesson_id, []).append(link)
+        for lesson in lessons:
+            setattr(lesson, attribute, links.get(lesson.id, []))
+    return lessons
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load time, serialization time and memory of catalog list reads')
+    parser.add_argument('--lessons', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with throwaway_database():
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import time
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.course.schemas import CourseTypeListAdapter
+from app.utils import serialize_response
+
+
+def build_tree(course_types: int, courses: int, lessons: int) -> list[dict]:
+    """Course types shaped as app.course.crud returns them, with every lesson fully populated."""
+    trainer = {"id": 1, "first_name": "Anna", "last_name": "Smirnova", "description": "Yoga and stretching coach",
+               "path_to_avatar": "files/trainers/avatar/a.png", "path_to_background": "files/trainers/background/b.png"}
+    tree = []
+    course_id = lesson_id = 0
+    for type_id in range(1, course_types + 1):
+        slug = f"type-{type_id}"
+        type_courses = []
+        for _ in range(courses):
+            course_id += 1
+            course_lessons = []
+            for _ in range(lessons):
+                lesson_id += 1
+                links = [{"id": lesson_id, "lesson_id": lesson_id, "linked_lesson_id": lesson_id - 1}]
+                course_lessons.append({
+                    "id": lesson_id, "title": f"Lesson {lesson_id}", "description": "Morning flow " * 8,
+                    "trainer": trainer, "course_id": course_id, "course_type_slug": slug,
+                    "path_to_cover": f"files/lessons/cover/{lesson_id}.png",
+                    "path_to_video": f"files/lessons/video/{lesson_id}.mp4",
+                    "path_to_audio": f"files/lessons/audio/{lesson_id}.mp3",
+                    "video_length": "00:42:17", "audio_length": "00:42:17",
+                    "links_before": links if lesson_id % 5 == 0 else [], "links_after": [],
+                    "number_of_views": lesson_id % 97,
+                    "is_viewed": lesson_id % 3 == 0, "is_favorite": lesson_id % 7 == 0,
+                })
+            type_courses.append({"id": course_id, "title": f"Course {course_id}", "description": "Course " * 16,
+                                 "course_type_id": type_id, "course_type_slug": slug,
+                                 "path_to_cover": f"files/courses/cover/{course_id}.png",
+                                 "number_of_views": sum(lesson["number_of_views"] for lesson in course_lessons),
+                                 "lessons": course_lessons})
+        tree.append({"id": type_id, "slug": slug, "courses": type_courses})
+    return tree
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validation and JSON encoding of a CourseTypeRead tree')
+    parser.add_argument('--course-types', type=int, default=4)
+    parser.add_argument('--courses', type=int, default=5)
+    parser.add_argument('--lessons', type=int, default=150, help='lessons per course')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    tree = build_tree(args.course_types, args.courses, args.lessons)
+    # response_model validation followed by the encoding of FastAPI's default and the orjson response classes,
+    # against the precompiled adapter the list endpoints use
+    encoders = {
+        "jsonable_encoder + json.dumps": lambda: JSONResponse(
+            jsonable_encoder(CourseTypeListAdapter.validate_python(tree))).body,
+        "jsonable_encoder + orjson": lambda: ORJSONResponse(
+            jsonable_encoder(CourseTypeListAdapter.validate_python(tree))).body,
+        "TypeAdapter": lambda: serialize_response(CourseTypeListAdapter, tree).body,
+    }
+
+    expected = None
+    for name, encode in encoders.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            body = encode()
+            best = min(best, time.perf_counter() - started)
+
+        payload = orjson.loads(body)
+        assert expected is None or payload == expected
+        expected = payload
+        print(f"{name}: {best * 1000:.1f} ms, {len(body)} bytes")
+
+
+if __name__ == "__main__":
+    main()
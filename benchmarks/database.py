@@ -0,0 +1,41 @@
+import asyncio
+import os
+import uuid
+from contextlib import contextmanager
+
+# The app builds its engine from DB_NAME on import, so the throwaway name is set before anything imports it
+DB_NAME = os.environ["DB_NAME"] = f"holiwell_bench_{uuid.uuid4().hex}"
+
+import asyncpg  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+import app.main  # noqa: E402 registers every model
+from app.catalog.models import CatalogVersion  # noqa: E402
+from app.config import DB_USER, DB_PASS, DB_HOST, DB_PORT  # noqa: E402
+from app.database import Base, engine  # noqa: E402
+
+
+@contextmanager
+def throwaway_database():
+    """Create the database the app points at for the benchmark and drop it afterwards."""
+    asyncio.run(_execute_on_server(f'CREATE DATABASE "{DB_NAME}"'))
+    try:
+        yield
+    finally:
+        asyncio.run(_execute_on_server(f'DROP DATABASE "{DB_NAME}" WITH (FORCE)'))
+
+
+async def create_schema():
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        # The migration creates the single version row, create_all does not
+        await connection.execute(insert(CatalogVersion).values(id=1, version=0))
+
+
+async def _execute_on_server(statement: str):
+    connection = await asyncpg.connect(user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT,
+                                       database="postgres")
+    try:
+        await connection.execute(statement)
+    finally:
+        await connection.close()
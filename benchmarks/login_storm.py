@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import time
+
+from benchmarks.database import create_schema, throwaway_database
+
+import httpx  # noqa: E402
+from fastapi_users.password import PasswordHelper  # noqa: E402
+
+from app.auth.models import User  # noqa: E402
+from app.auth.password import password_pool  # noqa: E402
+from app.database import async_session_maker, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.trainer.models import Trainer  # noqa: E402
+
+CATALOG_READ = "/api/trainers/all"
+
+
+async def run(args: argparse.Namespace) -> tuple[list[float], int]:
+    await create_schema()
+    async with async_session_maker() as session:
+        session.add_all([User(email="user@example.com", hashed_password=PasswordHelper().hash("password"),
+                              first_name="f", last_name="l"),
+                         Trainer(first_name="f", last_name="l", description="d",
+                                 path_to_avatar="files/trainers/avatar/a.png",
+                                 path_to_background="files/trainers/background/b.png")])
+        await session.commit()
+
+    stop = asyncio.Event()
+    logins = 0
+
+    async def log_in(http: httpx.AsyncClient, client: int):
+        nonlocal logins
+        # Half of the clients hit an existing user, the other half the dummy hash of unknown ones
+        username = "user@example.com" if client % 2 else f"nobody{client}@example.com"
+        while not stop.is_set():
+            response = await http.post("/auth/jwt/login", data={"username": username, "password": "wrong"})
+            assert response.status_code == 400
+            logins += 1
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as http:
+            await http.get(CATALOG_READ)
+            clients = [asyncio.create_task(log_in(http, client)) for client in range(args.clients)]
+
+            # Latency is measured from the scheduled start of every read, so a stalled event loop is counted
+            latencies = []
+            started = time.perf_counter()
+            for read in range(args.reads):
+                scheduled = started + read * args.interval
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                response = await http.get(CATALOG_READ)
+                assert response.status_code == 200
+                latencies.append(time.perf_counter() - scheduled)
+
+            stop.set()
+            await asyncio.gather(*clients)
+    await engine.dispose()
+    return latencies, logins
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency of catalog reads while clients keep failing to log in')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--reads', type=int, default=100)
+    parser.add_argument('--interval', type=float, default=0.05)
+    args = parser.parse_args()
+
+    with throwaway_database():
+        latencies, logins = asyncio.run(run(args))
+
+    latencies.sort()
+    p50, p99 = (latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 for q in (0.5, 0.99))
+    stats = password_pool.get_stats()
+    print(f"{len(latencies)} reads of {CATALOG_READ} during {logins} logins from {args.clients} clients: "
+          f"p50 {p50:.1f} ms, p99 {p99:.1f} ms, max {latencies[-1] * 1000:.1f} ms; "
+          f"{stats['workers']} hashing workers, max queue time {stats['max_queue_time'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+DIRECTORY = f"files/lessons/video/benchmark-{uuid.uuid4().hex}"
+
+
+async def run(args: argparse.Namespace, port: int, data: bytes) -> tuple[list[float], float]:
+    url = f"http://127.0.0.1:{port}/{DIRECTORY}/video.mp4"
+    latencies = []
+    requests = iter(range(args.requests))
+
+    async def client(http: httpx.AsyncClient):
+        for _ in requests:
+            start = random.randrange(len(data) - args.range_size)
+            end = start + args.range_size - 1
+            started = time.perf_counter()
+            response = await http.get(url, headers={"Range": f"bytes={start}-{end}"})
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 206 and response.content == data[start:end + 1]
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=None) as http:
+        await _wait_for_server(http, url)
+        started = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(args.concurrency)))
+    return latencies, time.perf_counter() - started
+
+
+async def _wait_for_server(http: httpx.AsyncClient, url: str):
+    for _ in range(100):
+        try:
+            await http.head(url)
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("The server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput of concurrent byte-range requests to /files')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--range-size', type=int, default=1024 ** 2)
+    parser.add_argument('--file-size', type=int, default=64 * 1024 ** 2)
+    args = parser.parse_args()
+
+    data = os.urandom(args.file_size)
+    os.makedirs(DIRECTORY)
+    with open(f"{DIRECTORY}/video.mp4", "wb") as file:
+        file.write(data)
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    # The media route needs no database, so the lifespan with its background tasks is not run
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                               "--lifespan", "off", "--log-level", "warning"])
+    try:
+        latencies, elapsed = asyncio.run(run(args, port, data))
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(DIRECTORY)
+
+    latencies.sort()
+    p50, p99 = (latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 for q in (0.5, 0.99))
+    print(f"{len(latencies)} ranges of {args.range_size} bytes, {args.concurrency} concurrent: "
+          f"{len(latencies) / elapsed:.0f} requests/s, {len(latencies) * args.range_size / elapsed / 1e6:.0f} MB/s, "
+          f"p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,21 +2,59 @@ import asyncio
 import logging
 import os
 
-import requests
+import httpx
 import shortuuid
 from aiogram import Bot, Dispatcher, types
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.filters.command import Command
 from aiogram.types import Message
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
 logging.basicConfig(level=logging.INFO)
 
 TOKEN = os.getenv('TELEGRAM_TOKEN')
+API_URL = f"http://{os.getenv('HOLIWELL_APP_HOST')}:{os.getenv('HOLIWELL_APP_PORT')}"
+API_TIMEOUT = float(os.getenv('BOT_API_TIMEOUT', 10))
+API_RETRIES = int(os.getenv('BOT_API_RETRIES', 3))
+MAX_CONCURRENCY = int(os.getenv('BOT_MAX_CONCURRENCY', 20))
+
+# Long polling is used unless a public webhook URL is set
+WEBHOOK_URL = os.getenv('BOT_WEBHOOK_URL')
+WEBHOOK_PATH = os.getenv('BOT_WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('BOT_WEBHOOK_SECRET')
+WEBHOOK_HOST = os.getenv('BOT_WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('BOT_WEBHOOK_PORT', 8001))
+
 bot = Bot(token=TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN_V2))
 
 dp = Dispatcher()
 
+# Shared by all handlers so that connections to the API are kept alive between messages
+api_client: httpx.AsyncClient | None = None
+handler_semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+registering: set[int] = set()
+
+
+@dp.startup()
+async def on_startup(bot: Bot):
+    global api_client
+    # Only failed connections are retried: a registration that reached the API must not be sent twice
+    api_client = httpx.AsyncClient(base_url=API_URL,
+                                   timeout=API_TIMEOUT,
+                                   limits=httpx.Limits(max_connections=MAX_CONCURRENCY),
+                                   transport=httpx.AsyncHTTPTransport(retries=API_RETRIES))
+    if WEBHOOK_URL:
+        await bot.set_webhook(f"{WEBHOOK_URL}{WEBHOOK_PATH}", secret_token=WEBHOOK_SECRET)
+
+
+@dp.shutdown()
+async def on_shutdown(bot: Bot):
+    if WEBHOOK_URL:
+        await bot.delete_webhook()
+    await api_client.aclose()
+
 
 @dp.message(Command("start"))
 async def cmd_start(message: types.Message):
@@ -26,27 +64,47 @@ async def cmd_start(message: types.Message):
 
 @dp.message()
 async def echo(message: Message):
+    # Messages sent while the user's registration is in flight would only get "already registered"
+    if message.from_user.id in registering:
+        return
+
+    registering.add(message.from_user.id)
+    try:
+        async with handler_semaphore:
+            text = await register(message.from_user)
+            await bot.send_message(chat_id=message.from_user.id, text=text)
+    finally:
+        registering.discard(message.from_user.id)
+
+
+async def register(user: types.User) -> str:
     password = shortuuid.ShortUUID().random(length=6)
-    response = requests.post(
-        f"http://{os.getenv('HOLIWELL_APP_HOST')}:{os.getenv('HOLIWELL_APP_PORT')}"
-        f"/auth/register", json={
+    try:
+        response = await api_client.post("/auth/register", json={
             'password': password,
-            'first_name': message.from_user.first_name,
-            'last_name': message.from_user.last_name,
-            'tg_id': message.from_user.id
-        }
-    )
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'tg_id': user.id
+        })
+    except httpx.HTTPError:
+        logging.exception("Failed to register Telegram user %s", user.id)
+        return "❌ Произошла ошибка"
+
     if response.status_code == 201:
-        text = (f"✅ Вы успешно зарегистрировались\!"
-                f"\n\nВаш логин: ```{message.from_user.id}```"
+        return (f"✅ Вы успешно зарегистрировались\!"
+                f"\n\nВаш логин: ```{user.id}```"
                 f"\nВаш пароль: ```{password}```"
                 f"\n\n_\(нажмите, чтобы скопировать\)_")
     elif response.status_code == 400:
-        text = "❕ Вы уже зарегистрированы"
-    else:
-        text = "❌ Произошла ошибка"
-    result = response.json()
-    await bot.send_message(chat_id=message.from_user.id, text=text)
+        return "❕ Вы уже зарегистрированы"
+    return "❌ Произошла ошибка"
+
+
+def run_webhook():
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    web.run_app(app, host=WEBHOOK_HOST, port=WEBHOOK_PORT)
 
 
 async def main():
@@ -54,4 +112,7 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if WEBHOOK_URL:
+        run_webhook()
+    else:
+        asyncio.run(main())
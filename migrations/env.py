@@ -12,6 +12,8 @@ from app.auth.models import *
 from app.trainer.models import *
 from app.lesson.models import *
 from app.course.models import *
+from app.upload.models import *
+from app.catalog.models import *
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,49 @@
+"""access_path_indexes
+
+Revision ID: 7e4c97a05c29
+Revises: 781fcced734b
+Create Date: 2026-10-18 10:41:08.930264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e4c97a05c29'
+down_revision: Union[str, None] = '781fcced734b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_view_user_id_lesson_id', 'view', ['user_id', 'lesson_id'], True),
+    ('ix_view_lesson_id', 'view', ['lesson_id'], False),
+    ('ix_favorite_user_id_lesson_id', 'favorite', ['user_id', 'lesson_id'], True),
+    ('ix_favorite_lesson_id', 'favorite', ['lesson_id'], False),
+    ('ix_planned_lesson_user_id_timestamp', 'planned_lesson', ['user_id', 'timestamp'], False),
+    ('ix_planned_lesson_lesson_id', 'planned_lesson', ['lesson_id'], False),
+    ('ix_link_before_lesson_lesson_id', 'link_before_lesson', ['lesson_id'], False),
+    ('ix_link_before_lesson_linked_lesson_id', 'link_before_lesson', ['linked_lesson_id'], False),
+    ('ix_link_after_lesson_lesson_id', 'link_after_lesson', ['lesson_id'], False),
+    ('ix_link_after_lesson_linked_lesson_id', 'link_after_lesson', ['linked_lesson_id'], False),
+]
+
+
+def upgrade() -> None:
+    # Unique indexes can't be built while concurrent taps left duplicate rows behind
+    for table in ('view', 'favorite'):
+        op.execute(f'DELETE FROM {table} a USING {table} b '
+                   f'WHERE a.user_id = b.user_id AND a.lesson_id = b.lesson_id AND a.id > b.id')
+
+    # CREATE INDEX CONCURRENTLY doesn't lock writes but can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
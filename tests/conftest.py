@@ -0,0 +1,46 @@
+import asyncio
+import uuid
+
+import asyncpg
+import pytest
+
+from app.config import DB_USER, DB_PASS, DB_HOST, DB_PORT
+
+
+@pytest.fixture
+def database_url() -> str:
+    """URL of a throwaway database with the current schema, dropped after the test."""
+    name = f"holiwell_test_{uuid.uuid4().hex}"
+    url = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{name}"
+    asyncio.run(_execute_on_server(f'CREATE DATABASE "{name}"'))
+    try:
+        asyncio.run(_create_schema(url))
+        yield url
+    finally:
+        asyncio.run(_execute_on_server(f'DROP DATABASE "{name}"'))
+
+
+async def _execute_on_server(statement: str):
+    connection = await asyncpg.connect(user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT,
+                                       database="postgres")
+    try:
+        await connection.execute(statement)
+    finally:
+        await connection.close()
+
+
+async def _create_schema(url: str):
+    from sqlalchemy import insert
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from app.catalog.models import CatalogVersion
+    from app.database import Base
+
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+            # The migration creates the single version row, create_all does not
+            await connection.execute(insert(CatalogVersion).values(id=1, version=0))
+    finally:
+        await engine.dispose()
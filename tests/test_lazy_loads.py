@@ -0,0 +1,153 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.config import DB_HOST
+
+if not DB_HOST:
+    pytest.skip("DB_HOST must point to a Postgres server to create a throwaway database in",
+                allow_module_level=True)
+
+import app.main  # noqa: E402 registers every model
+from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase  # noqa: E402
+
+from app.auth import crud as auth_crud, schemas as auth_schemas  # noqa: E402
+from app.auth.models import User, View, Favorite, PlannedLesson  # noqa: E402
+from app.course import crud as course_crud, schemas as course_schemas  # noqa: E402
+from app.course.models import Course, CourseType  # noqa: E402
+from app.lesson import crud as lesson_crud, schemas as lesson_schemas  # noqa: E402
+from app.lesson.models import Lesson, LinkBeforeLesson, LinkAfterLesson  # noqa: E402
+from app.trainer import crud as trainer_crud, schemas as trainer_schemas  # noqa: E402
+from app.trainer.models import Trainer  # noqa: E402
+
+
+def test_read_and_delete_paths_load_relationships_explicitly(database_url):
+    # Reads touching a relationship they did not load raise, but the unit of work still lazy loads the
+    # collections a delete cascades through, so those loads are recorded as well
+    lazy_loads = []
+
+    def record_lazy_load(orm_execute_state: ORMExecuteState):
+        if orm_execute_state.is_select and orm_execute_state.lazy_loaded_from is not None:
+            lazy_loads.append(str(orm_execute_state.statement))
+
+    event.listen(Session, "do_orm_execute", record_lazy_load)
+    try:
+        asyncio.run(_check_paths(database_url, lazy_loads))
+    finally:
+        event.remove(Session, "do_orm_execute", record_lazy_load)
+
+
+async def _check_paths(database_url: str, lazy_loads: list):
+    engine = create_async_engine(database_url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with session_maker() as session:
+            ids = await _seed(session)
+        await _check_reads(session_maker, ids)
+        await _check_deletes(session_maker, ids)
+        assert lazy_loads == []
+        # fastapi-users deletes the user it fetched itself, so its cascade is only checked to go through
+        await _check_user_delete(session_maker, ids)
+    finally:
+        await engine.dispose()
+
+
+async def _seed(session) -> dict:
+    user = User(email="user@example.com", hashed_password="x", first_name="f", last_name="l")
+    trainer = Trainer(first_name="f", last_name="l", description="d", path_to_avatar="files/trainers/avatar/a.png",
+                      path_to_background="files/trainers/background/b.png")
+    course_type = CourseType(slug="yoga")
+    course = Course(title="c", description="d", path_to_cover="files/courses/cover/c.png", course_type=course_type)
+    session.add_all([user, trainer, course])
+    await session.flush()
+
+    lessons = [Lesson(title=f"l{i}", description="d", trainer_id=trainer.id, course_id=course.id if i else None)
+               for i in range(3)]
+    session.add_all(lessons)
+    await session.flush()
+
+    first, second, third = lessons
+    session.add_all([LinkBeforeLesson(lesson_id=second.id, linked_lesson_id=first.id),
+                     LinkAfterLesson(lesson_id=second.id, linked_lesson_id=third.id)])
+    # The user keeps marks on the third lesson after the second is deleted, so deleting the user cascades
+    for lesson in (second, third):
+        session.add_all([View(user_id=user.id, lesson_id=lesson.id),
+                         Favorite(user_id=user.id, lesson_id=lesson.id),
+                         PlannedLesson(user_id=user.id, lesson_id=lesson.id, timestamp=datetime.now(timezone.utc))])
+    await session.commit()
+    return {"user": user.id, "trainer": trainer.id, "course_type": course_type.slug, "course": course.id,
+            "lessons": [lesson.id for lesson in lessons]}
+
+
+async def _check_reads(session_maker, ids: dict):
+    user_id = ids["user"]
+    for reader_id in (None, user_id):
+        async with session_maker() as session:
+            for compact in (False, True):
+                lessons, _ = await lesson_crud.get_lessons(None, reader_id, None, session, compact=compact)
+                adapter = lesson_schemas.LessonSummaryListAdapter if compact else lesson_schemas.LessonListAdapter
+                assert len(adapter.validate_python(lessons)) == 3
+
+                course_types = await course_crud.get_course_types(reader_id, None, session, compact)
+                adapter = (course_schemas.CourseTypeSummaryListAdapter if compact
+                           else course_schemas.CourseTypeListAdapter)
+                assert len(adapter.validate_python(course_types)) == 1
+
+                course_type = await course_crud.get_course_type(ids["course_type"], reader_id, None, session, compact)
+                adapter = course_schemas.CourseTypeSummaryAdapter if compact else course_schemas.CourseTypeAdapter
+                adapter.validate_python(course_type)
+
+                courses = await course_crud.get_courses(reader_id, None, session, compact)
+                adapter = course_schemas.CourseSummaryListAdapter if compact else course_schemas.CourseListAdapter
+                assert len(adapter.validate_python(courses)) == 1
+
+            lesson = await lesson_crud.get_lesson(ids["lessons"][1], reader_id, session)
+            lesson_schemas.LessonRead.model_validate(lesson)
+            course = await course_crud.get_course(ids["course"], reader_id, None, session)
+            course_schemas.CourseRead.model_validate(course)
+
+    async with session_maker() as session:
+        trainers = await trainer_crud.get_trainers(session)
+        assert len(trainer_schemas.TrainerListAdapter.validate_python(trainers)) == 1
+        trainer_schemas.TrainerRead.model_validate(await trainer_crud.get_trainer(ids["trainer"], session))
+
+        views, _ = await auth_crud.get_views_by_user(user_id, session)
+        favorites, _ = await auth_crud.get_favorites_by_user(user_id, session)
+        for lessons in (views, favorites):
+            assert lesson_schemas.LessonListAdapter.validate_python(lessons)[0].is_viewed
+        for compact in (False, True):
+            planned_lessons, _ = await auth_crud.get_planned_lessons_by_user(user_id, session, compact=compact)
+            adapter = (auth_schemas.PlannedLessonCompactListAdapter if compact
+                       else auth_schemas.PlannedLessonListAdapter)
+            assert len(adapter.validate_python(planned_lessons)) == 2
+        users = await auth_crud.get_all_users(session)
+        assert len([auth_schemas.UserRead.model_validate(user) for user in users]) == 1
+
+
+async def _check_deletes(session_maker, ids: dict):
+    async with session_maker() as session:
+        assert await lesson_crud.delete_lesson(ids["lessons"][1], session) is None
+    async with session_maker() as session:
+        assert await course_crud.delete_course(ids["course"], session)
+    async with session_maker() as session:
+        assert await trainer_crud.delete_trainer(ids["trainer"], session)
+
+    async with session_maker() as session:
+        lessons = (await session.scalars(select(Lesson).order_by(Lesson.id))).all()
+        assert [lesson.id for lesson in lessons] == [ids["lessons"][0], ids["lessons"][2]]
+        assert all(lesson.course_id is None and lesson.trainer_id is None for lesson in lessons)
+        for model in (View, Favorite, PlannedLesson):
+            assert await session.scalar(select(func.count()).select_from(model)) == 1
+
+
+async def _check_user_delete(session_maker, ids: dict):
+    async with session_maker() as session:
+        user_db = SQLAlchemyUserDatabase(session, User)
+        await user_db.delete(await user_db.get(ids["user"]))
+    async with session_maker() as session:
+        for model in (View, Favorite, PlannedLesson):
+            assert await session.scalar(select(func.count()).select_from(model)) == 0
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.config import DB_HOST
+
+if not DB_HOST:
+    pytest.skip("DB_HOST must point to a Postgres server to create a throwaway database in",
+                allow_module_level=True)
+
+import app.main  # noqa: E402 registers every model
+from app.auth.models import User, View, Favorite  # noqa: E402
+from app.course.models import Course, CourseType  # noqa: E402
+from app.lesson import crud  # noqa: E402
+from app.lesson.models import Lesson, LinkBeforeLesson, LinkAfterLesson  # noqa: E402
+from app.trainer.models import Trainer  # noqa: E402
+
+LESSONS = 5
+
+
+def test_get_lessons_query_count_does_not_grow_with_catalog(database_url):
+    asyncio.run(_check_query_counts(database_url))
+
+
+async def _check_query_counts(database_url: str):
+    engine = create_async_engine(database_url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        await _compare_query_counts(engine, session_maker)
+    finally:
+        await engine.dispose()
+
+
+async def _compare_query_counts(engine: AsyncEngine, session_maker):
+    async with session_maker() as session:
+        user = User(email="user@example.com", hashed_password="x", first_name="f", last_name="l")
+        trainer = Trainer(first_name="f", last_name="l", description="d")
+        course = Course(title="c", description="d", course_type=CourseType(slug="yoga"))
+        session.add_all([user, trainer, course])
+        await session.commit()
+
+        await _add_lessons(LESSONS, user, trainer, course, session)
+        small = await _count_queries(engine, session_maker, user.id, LESSONS)
+        await _add_lessons(9 * LESSONS, user, trainer, course, session)
+        large = await _count_queries(engine, session_maker, user.id, 10 * LESSONS)
+
+    assert large == small
+
+
+async def _add_lessons(number: int, user: User, trainer: Trainer, course: Course, session):
+    lessons = [Lesson(title=f"l{i}", description="d", trainer_id=trainer.id, course_id=course.id)
+               for i in range(number)]
+    session.add_all(lessons)
+    await session.flush()
+
+    # Every lesson has links and per-user marks, so loading any of them lazily would show up
+    for previous, lesson in zip(lessons, lessons[1:]):
+        session.add_all([LinkBeforeLesson(lesson_id=lesson.id, linked_lesson_id=previous.id),
+                         LinkAfterLesson(lesson_id=previous.id, linked_lesson_id=lesson.id),
+                         View(user_id=user.id, lesson_id=lesson.id),
+                         Favorite(user_id=user.id, lesson_id=lesson.id)])
+    await session.commit()
+
+
+async def _count_queries(engine: AsyncEngine, session_maker, user_id: int, number: int) -> dict:
+    counts = {}
+    for sort_by in (None, "popular"):
+        for reader_id in (None, user_id):
+            statements = []
+
+            def count(conn, cursor, statement, *args):
+                statements.append(statement)
+
+            event.listen(engine.sync_engine, "before_cursor_execute", count)
+            try:
+                async with session_maker() as session:
+                    # Each limit is cached separately, so each size is read from the database
+                    lessons, _ = await crud.get_lessons(sort_by, reader_id, None, session, limit=number)
+            finally:
+                event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+            assert len(lessons) == number
+            counts[sort_by, reader_id] = len(statements)
+    return counts
+